@@ -7,16 +7,15 @@ import os
 import sys
 from dotenv import load_dotenv
 
-# Add src to path
-sys.path.insert(0, 'src')
-
 # Load environment
 load_dotenv()
 
 # Import Flask app to get database connection
-from app import app
-from extensions import db
-from models.models import NIBRSCrimeData
+from src.app import create_app
+from src.extensions import db
+from src.models.models import NIBRSCrimeData
+
+app = create_app()
 
 print("=" * 60)
 print("🔍 Checking NIBRS Data in Database")
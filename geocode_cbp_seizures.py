@@ -4,11 +4,13 @@ Adds lat/lon coordinates based on city/state or area_of_responsibility
 """
 
 import sys
-sys.path.insert(0, 'src')
 
-from app import app
-from extensions import db
-from models.models import CBPDrugSeizure
+from sqlalchemy import Float, String, column, func, text, update, values
+from src.app import create_app
+from src.extensions import db
+from src.models.models import CBPDrugSeizure, NEAREST_VENUE_BACKFILL_SQL
+
+app = create_app()
 
 print("=" * 70)
 print("🗺️  CBP Drug Seizures Geocoding")
@@ -85,28 +87,40 @@ with app.app_context():
     
     print(f"\n📍 Matched {len(area_lookup)} areas to field offices")
     
-    # Update records
+    # Update records: one UPDATE joined against the matched areas as a
+    # VALUES list, instead of loading and setting each row
     updated = 0
-    for area, loc in area_lookup.items():
-        records = db.session.query(CBPDrugSeizure).filter(
-            CBPDrugSeizure.area_of_responsibility == area,
-            CBPDrugSeizure.latitude.is_(None)
-        ).all()
+    if area_lookup:
+        offices = values(
+            column('area', String), column('lat', Float), column('lon', Float),
+            column('city', String), column('state', String),
+            name='offices'
+        ).data([
+            (area, loc['lat'], loc['lon'], loc['city'], loc['state'])
+            for area, loc in area_lookup.items()
+        ])
         
-        for record in records:
-            record.latitude = loc['lat']
-            record.longitude = loc['lon']
-            if not record.city:
-                record.city = loc['city']
-            if not record.state:
-                record.state = loc['state']
-            updated += 1
+        result = db.session.execute(
+            update(CBPDrugSeizure)
+            .where(
+                CBPDrugSeizure.area_of_responsibility == offices.c.area,
+                CBPDrugSeizure.latitude.is_(None)
+            )
+            .values(
+                latitude=offices.c.lat,
+                longitude=offices.c.lon,
+                city=func.coalesce(func.nullif(CBPDrugSeizure.city, ''), offices.c.city),
+                state=func.coalesce(func.nullif(CBPDrugSeizure.state, ''), offices.c.state)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        updated = result.rowcount
         
-        if updated % 1000 == 0:
-            db.session.commit()
-            print(f"   Updated: {updated:,} records...")
+        # Core UPDATEs skip set_nearest_venue, so link the rows located
+        # above to their nearest venue here
+        result = db.session.execute(text(NEAREST_VENUE_BACKFILL_SQL.format(table='cbp_drug_seizures')))
+        print(f"   ✓ Nearest venue set on {result.rowcount:,} records")
     
-    # Final commit
     db.session.commit()
     
     # Final count
@@ -9,19 +9,17 @@ This uses a simple geocoding approach:
 4. Saves progress periodically
 """
 
-import sys
 import time
 from datetime import datetime
 
-# Add src to path
-sys.path.insert(0, 'src')
-
-from app import app
-from extensions import db
-from models.models import NIBRSCrimeData
+from src.app import create_app
+from src.extensions import db
+from src.models.models import NIBRSCrimeData
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 
+app = create_app()
+
 print("=" * 70)
 print("🗺️  NIBRS Data Geocoding Script")
 print("=" * 70)
@@ -62,7 +62,9 @@ def add_geocoding_columns():
                 ('latitude', 'FLOAT'),
                 ('longitude', 'FLOAT'),
                 ('city', 'VARCHAR(100)'),
-                ('state', 'VARCHAR(50)')
+                ('state', 'VARCHAR(50)'),
+                ('nearest_venue_id', 'INTEGER'),
+                ('nearest_venue_km', 'FLOAT')
             ]
             
             for col_name, col_type in columns_to_add:
@@ -85,30 +87,68 @@ def add_geocoding_columns():
             updated_count = 0
             not_found_offices = set()
             
-            for office_name, location in CBP_FIELD_OFFICE_LOCATIONS.items():
-                try:
-                    result = conn.execute(text("""
-                        UPDATE cbp_drug_seizures
-                        SET latitude = :lat,
-                            longitude = :lon,
-                            city = :city,
-                            state = :state
-                        WHERE area_of_responsibility = :office
-                    """), {
-                        'lat': location['lat'],
-                        'lon': location['lon'],
-                        'city': location['city'],
-                        'state': location['state'],
-                        'office': office_name
-                    })
-                    conn.commit()
-                    
-                    if result.rowcount > 0:
-                        updated_count += result.rowcount
-                        print(f"   ✓ {office_name}: {result.rowcount} records updated")
-                    
-                except Exception as e:
-                    print(f"   ⚠️  Error updating {office_name}: {e}")
+            # One UPDATE joined against the mapping sent as parallel arrays
+            # (one array per field) instead of one UPDATE per office
+            try:
+                rows = conn.execute(text("""
+                    WITH offices AS (
+                        SELECT * FROM unnest(
+                            CAST(:offices AS text[]), CAST(:lats AS float8[]),
+                            CAST(:lons AS float8[]), CAST(:cities AS text[]),
+                            CAST(:states AS text[])
+                        ) AS o(office, lat, lon, city, state)
+                    ),
+                    updated AS (
+                        UPDATE cbp_drug_seizures t
+                        SET latitude = o.lat,
+                            longitude = o.lon,
+                            city = o.city,
+                            state = o.state
+                        FROM offices o
+                        WHERE t.area_of_responsibility = o.office
+                        RETURNING t.area_of_responsibility
+                    )
+                    SELECT area_of_responsibility, COUNT(*)
+                    FROM updated
+                    GROUP BY area_of_responsibility
+                    ORDER BY area_of_responsibility
+                """), {
+                    'offices': list(CBP_FIELD_OFFICE_LOCATIONS),
+                    'lats': [loc['lat'] for loc in CBP_FIELD_OFFICE_LOCATIONS.values()],
+                    'lons': [loc['lon'] for loc in CBP_FIELD_OFFICE_LOCATIONS.values()],
+                    'cities': [loc['city'] for loc in CBP_FIELD_OFFICE_LOCATIONS.values()],
+                    'states': [loc['state'] for loc in CBP_FIELD_OFFICE_LOCATIONS.values()]
+                }).fetchall()
+                conn.commit()
+                
+                for office_name, count in rows:
+                    updated_count += count
+                    print(f"   ✓ {office_name}: {count} records updated")
+                
+            except Exception as e:
+                conn.rollback()
+                print(f"   ⚠️  Error updating field offices: {e}")
+            
+            # Coordinates changed, so refresh each row's nearest venue
+            # (only ~16 venues, so a per-row sort over them is cheap)
+            result = conn.execute(text("""
+                UPDATE cbp_drug_seizures t
+                SET (nearest_venue_id, nearest_venue_km) = (
+                    SELECT v.id,
+                           ST_Distance(
+                               ST_MakePoint(t.longitude, t.latitude)::geography,
+                               ST_MakePoint(v.longitude, v.latitude)::geography,
+                               false
+                           ) / 1000 AS km
+                    FROM worldcup_venues v
+                    WHERE v.latitude IS NOT NULL AND v.longitude IS NOT NULL
+                    ORDER BY km
+                    LIMIT 1
+                )
+                WHERE t.latitude IS NOT NULL AND t.longitude IS NOT NULL
+            """))
+            conn.commit()
+            print(f"   ✓ Nearest venue set on {result.rowcount:,} records")
             
             # Step 3: Check for offices not in our mapping
             print("\n3. Checking for unmapped field offices...")
@@ -14,7 +14,7 @@ try:
         # Add month_number column if it doesn't exist
         conn.execute(text('''
             ALTER TABLE cbp_drug_seizures 
-            ADD COLUMN IF NOT EXISTS month_number INTEGER
+            ADD COLUMN IF NOT EXISTS month_number SMALLINT
         '''))
         conn.commit()
         print('✓ Column month_number added successfully')
@@ -16,28 +16,28 @@ sys.path.append('src')
 
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import json
 from dotenv import load_dotenv
-from math import radians, cos, sin, asin, sqrt
 
 load_dotenv()
 
 
-def calculate_distance(lat1, lon1, lat2, lon2):
+def calculate_distance_bulk(lat1, lon1, lat2, lon2):
     """
-    Calculate distance between two points using Haversine formula
-    Returns distance in kilometers
+    Calculate distances between points using Haversine formula
+    Accepts scalars or numpy arrays (broadcast), returns kilometers
     """
     # Convert to radians
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+    lon1, lat1, lon2, lat2 = map(np.radians, [lon1, lat1, lon2, lat2])
     
     # Haversine formula
     dlon = lon2 - lon1
     dlat = lat2 - lat1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
+    a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
+    c = 2 * np.arcsin(np.sqrt(a))
     
     # Radius of earth in kilometers
     r = 6371
@@ -125,6 +125,11 @@ def analyze_venue_crime(db_url=None, radius_km=50, year=2024):
     
     venue_analysis = []
     
+    # Crime coordinates as arrays, so each venue needs one vectorized
+    # distance pass instead of a Python loop over every agency
+    crime_lat = crime_df['latitude'].to_numpy(dtype=float)
+    crime_lon = crime_df['longitude'].to_numpy(dtype=float)
+    
     for idx, venue in venues_df.iterrows():
         venue_lat = venue['latitude']
         venue_lon = venue['longitude']
@@ -133,21 +138,12 @@ def analyze_venue_crime(db_url=None, radius_km=50, year=2024):
             continue
         
         # Find nearby crime agencies
-        nearby_crimes = []
+        distances = calculate_distance_bulk(venue_lat, venue_lon, crime_lat, crime_lon)
+        within = np.flatnonzero(distances <= radius_km)
         
-        for _, crime in crime_df.iterrows():
-            crime_lat = crime['latitude']
-            crime_lon = crime['longitude']
-            
-            if pd.isna(crime_lat) or pd.isna(crime_lon):
-                continue
-            
-            distance = calculate_distance(venue_lat, venue_lon, crime_lat, crime_lon)
-            
-            if distance <= radius_km:
-                crime_data = crime.to_dict()
-                crime_data['distance_km'] = distance
-                nearby_crimes.append(crime_data)
+        nearby_crimes = crime_df.iloc[within].to_dict('records')
+        for crime_data, distance in zip(nearby_crimes, distances[within]):
+            crime_data['distance_km'] = float(distance)
         
         # Calculate statistics
         if nearby_crimes:
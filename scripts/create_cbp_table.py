@@ -23,7 +23,7 @@ def create_cbp_table():
         id SERIAL PRIMARY KEY,
         fiscal_year INTEGER,
         month VARCHAR(10),
-        month_number INTEGER,
+        month_number SMALLINT,
         component VARCHAR(200),
         region VARCHAR(200),
         land_filter VARCHAR(100),
@@ -33,17 +33,28 @@ def create_cbp_table():
         quantity_lbs FLOAT,
         latitude FLOAT,
         longitude FLOAT,
+        geog geography(Point, 4326) GENERATED ALWAYS AS (
+            ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography
+        ) STORED,
         city VARCHAR(100),
         state VARCHAR(100),
+        nearest_venue_id INTEGER,
+        nearest_venue_km FLOAT,
         data_source VARCHAR(200),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
     );
     
     CREATE INDEX IF NOT EXISTS idx_cbp_fiscal_year ON cbp_drug_seizures(fiscal_year);
     CREATE INDEX IF NOT EXISTS idx_cbp_drug_type ON cbp_drug_seizures(drug_type);
-    CREATE INDEX IF NOT EXISTS idx_cbp_location ON cbp_drug_seizures(latitude, longitude);
     CREATE INDEX IF NOT EXISTS idx_cbp_area ON cbp_drug_seizures(area_of_responsibility);
+    CREATE INDEX IF NOT EXISTS idx_cbp_geog ON cbp_drug_seizures USING GIST (geog);
+    CREATE INDEX IF NOT EXISTS ix_cbp_drug_seizures_nearest_venue_id ON cbp_drug_seizures(nearest_venue_id);
+    
+    -- Partial index over geocoded rows only: serves the map query
+    -- (coordinates present, ORDER BY event_count DESC) and coordinate counts
+    CREATE INDEX IF NOT EXISTS idx_cbp_has_coords ON cbp_drug_seizures(event_count DESC)
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL;
     """
     
     try:
@@ -58,8 +69,10 @@ def create_cbp_table():
         print("Indexes created on:")
         print("  - fiscal_year")
         print("  - drug_type")
-        print("  - latitude, longitude")
+        print("  - geog (GiST)")
+        print("  - nearest_venue_id")
         print("  - area_of_responsibility")
+        print("  - event_count (geocoded rows only)")
         print("=" * 60)
         
     except Exception as e:
@@ -266,7 +266,9 @@ def update_database_with_filtered_data(df, db_url=None):
                     'number_missing': int(row.get('number_missing', 0)),
                     'number_survivors': int(row.get('number_survivors', 0)),
                     'cause_of_death': str(row.get('cause_of_death', ''))[:200],
-                    'migrant_origin_countries': str(row.get('origin_region', ''))[:200],
+                    'migrant_origin_countries': [
+                        c.strip() for c in str(row['origin_region']).split(',') if c.strip()
+                    ] if pd.notna(row.get('origin_region')) else None,
                     'source_id': source_id,
                     'source_quality': str(row.get('source_quality', 'unverified'))[:20],
                     'is_verified': False
@@ -1,11 +1,14 @@
 import sys
 import os
-sys.path.append('src')
+# Repo root on the path; first-party code is imported as src.* everywhere
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import pandas as pd
 from sqlalchemy import create_engine, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import sessionmaker
-from models.models import Base
+from src.models.models import CBPDrugSeizure
+from src.extensions import clear_api_cache
 from datetime import datetime
 from dotenv import load_dotenv
 import glob
@@ -13,6 +16,12 @@ import re
 
 load_dotenv()
 
+# Rows per INSERT ... ON CONFLICT DO NOTHING statement
+BATCH_SIZE = 1000
+
+# Natural key of a seizure row (idx_cbp_unique)
+CBP_UNIQUE_COLUMNS = ['fiscal_year', 'month', 'component', 'area_of_responsibility', 'drug_type']
+
 
 def parse_fiscal_year(fy_string):
     """Parse fiscal year, handling '2025 (FYTD)' format"""
@@ -63,13 +72,20 @@ def load_cbp_drug_data(files):
                 drug_type VARCHAR(100),
                 event_count INTEGER,
                 quantity_lbs FLOAT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(fiscal_year, month, component, area_of_responsibility, drug_type)
+                created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
             )
         """))
         session.commit()
         print("✓ Table created: cbp_drug_seizures")
     
+    # ON CONFLICT needs the natural key to be backed by a unique index; this
+    # is the only one (the table has no inline UNIQUE constraint to duplicate it)
+    session.execute(text(f"""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_cbp_unique
+        ON cbp_drug_seizures ({', '.join(CBP_UNIQUE_COLUMNS)})
+    """))
+    session.commit()
+    
     print(f"\nFound {len(files)} files to process:")
     for f in files:
         print(f"  - {os.path.basename(f)}")
@@ -93,67 +109,56 @@ def load_cbp_drug_data(files):
             file_duplicates = 0
             file_errors = 0
             
-            for idx, row in df.iterrows():
+            def column(name):
+                # Missing columns read as empty strings, like row.get(name, '')
+                return df[name].astype(str) if name in df.columns else pd.Series('', index=df.index)
+            
+            def numeric(name):
+                if name not in df.columns:
+                    return pd.Series(0, index=df.index)
+                return pd.to_numeric(df[name], errors='coerce').fillna(0)
+            
+            # Parse fiscal year
+            fiscal_years = df['FY'].map(parse_fiscal_year) if 'FY' in df.columns else pd.Series(None, index=df.index)
+            bad_fy = fiscal_years.isna()
+            file_errors += int(bad_fy.sum())
+            for idx in df.index[bad_fy][:3]:
+                print(f"\n    ⚠ Error on row {idx}: Could not parse fiscal year: {df.at[idx, 'FY'] if 'FY' in df.columns else None}")
+            
+            records = pd.DataFrame({
+                'fiscal_year': fiscal_years,
+                'month': column('Month (abbv)'),
+                'component': column('Component'),
+                'region': column('Region'),
+                'land_filter': column('Land Filter'),
+                'area_of_responsibility': column('Area of Responsibility'),
+                'drug_type': column('Drug Type'),
+                'event_count': numeric('Count of Event').astype(int),
+                'quantity_lbs': numeric('Sum Qty (lbs)').astype(float)
+            })[~bad_fy]
+            records['fiscal_year'] = records['fiscal_year'].astype(int)
+            rows = records.to_dict('records')
+            
+            # Insert in batches; rows already in the table are skipped by the
+            # database instead of a SELECT per row
+            for start in range(0, len(rows), BATCH_SIZE):
+                batch = rows[start:start + BATCH_SIZE]
                 try:
-                    # Parse fiscal year
-                    fy = parse_fiscal_year(row.get('FY'))
-                    
-                    if fy is None:
-                        file_errors += 1
-                        if file_errors <= 3:
-                            print(f"\n    ⚠ Error on row {idx}: Could not parse fiscal year: {row.get('FY')}")
-                        continue
-                    
-                    # Check for duplicate
-                    existing = session.execute(text("""
-                        SELECT COUNT(*) FROM cbp_drug_seizures 
-                        WHERE fiscal_year = :fy 
-                        AND month = :month 
-                        AND component = :component 
-                        AND area_of_responsibility = :area 
-                        AND drug_type = :drug
-                    """), {
-                        'fy': fy,
-                        'month': str(row.get('Month (abbv)', '')),
-                        'component': str(row.get('Component', '')),
-                        'area': str(row.get('Area of Responsibility', '')),
-                        'drug': str(row.get('Drug Type', ''))
-                    }).scalar()
-                    
-                    if existing > 0:
-                        file_duplicates += 1
-                        continue
-                    
-                    # Insert record
-                    session.execute(text("""
-                        INSERT INTO cbp_drug_seizures 
-                        (fiscal_year, month, component, region, land_filter, 
-                         area_of_responsibility, drug_type, event_count, quantity_lbs)
-                        VALUES (:fy, :month, :component, :region, :land_filter,
-                                :area, :drug, :events, :qty)
-                    """), {
-                        'fy': fy,
-                        'month': str(row.get('Month (abbv)', '')),
-                        'component': str(row.get('Component', '')),
-                        'region': str(row.get('Region', '')),
-                        'land_filter': str(row.get('Land Filter', '')),
-                        'area': str(row.get('Area of Responsibility', '')),
-                        'drug': str(row.get('Drug Type', '')),
-                        'events': int(row.get('Count of Event', 0)) if pd.notna(row.get('Count of Event')) else 0,
-                        'qty': float(row.get('Sum Qty (lbs)', 0)) if pd.notna(row.get('Sum Qty (lbs)')) else 0.0
-                    })
-                    
-                    file_loaded += 1
-                    
-                    if file_loaded % 100 == 0:
-                        session.commit()
-                        print(f"    Progress: {file_loaded} records loaded...", end='\r')
-                
+                    result = session.execute(
+                        pg_insert(CBPDrugSeizure.__table__)
+                        .values(batch)
+                        .on_conflict_do_nothing(index_elements=CBP_UNIQUE_COLUMNS)
+                    )
+                    session.commit()
                 except Exception as e:
-                    file_errors += 1
-                    if file_errors <= 3:
-                        print(f"\n    ⚠ Error on row {idx}: {e}")
+                    session.rollback()
+                    file_errors += len(batch)
+                    print(f"\n    ⚠ Error on rows {start}-{start + len(batch) - 1}: {e}")
                     continue
+                
+                file_loaded += result.rowcount
+                file_duplicates += len(batch) - result.rowcount
+                print(f"    Progress: {file_loaded} records loaded...", end='\r')
             
             session.commit()
             
@@ -210,6 +215,10 @@ def load_cbp_drug_data(files):
     
     session.close()
     
+    # Cached API responses still hold the old data
+    if clear_api_cache():
+        print("   ✓ API cache cleared")
+    
     print(f"\n{'='*80}")
     print("✓ LOADING COMPLETE!")
     print(f"{'='*80}")
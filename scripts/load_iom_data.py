@@ -10,16 +10,16 @@ Place in: scripts/load_iom_data.py
 import sys
 import os
 
-# Add the src directory to the path
+# Add the project root to the path (first-party code is imported as src.*)
 script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(script_dir)
-src_dir = os.path.join(project_root, 'src')
-sys.path.insert(0, src_dir)
+sys.path.insert(0, project_root)
 
 import pandas as pd
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from models.models import Base, DataSource, SmugglingIncident
+from src.models.models import DataSource, SmugglingIncident, bulk_insert, split_list
+from src.extensions import clear_api_cache
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -31,7 +31,7 @@ def load_iom_data(csv_file=None, db_url=None):
     Load IOM data from CSV into database
     
     Args:
-        csv_file: Path to processed CSV file
+        csv_file: Path to processed CSV (or Parquet) file
         db_url: Database connection string
     """
     print("=" * 60)
@@ -43,8 +43,10 @@ def load_iom_data(csv_file=None, db_url=None):
         # Try Americas filtered file first, then full processed
         possible_files = [
             'data/processed/iom_americas_filtered.csv',
+            'data/processed/iom_processed.parquet',
             'data/processed/iom_processed.csv',
             '../data/processed/iom_americas_filtered.csv',
+            '../data/processed/iom_processed.parquet',
             '../data/processed/iom_processed.csv',
         ]
         
@@ -68,9 +70,12 @@ def load_iom_data(csv_file=None, db_url=None):
         print(f"❌ Error: File not found: {csv_file}")
         return False
     
-    # Read CSV
-    print(f"\n1. Reading CSV file: {csv_file}")
-    df = pd.read_csv(csv_file)
+    # Read CSV (or the typed Parquet copy written by setup_iom_americas.py)
+    print(f"\n1. Reading data file: {csv_file}")
+    if csv_file.endswith('.parquet'):
+        df = pd.read_parquet(csv_file, engine='pyarrow')
+    else:
+        df = pd.read_csv(csv_file)
     print(f"   ✓ Loaded {len(df):,} records")
     
     # Show what regions are included
@@ -150,6 +155,7 @@ def load_iom_data(csv_file=None, db_url=None):
     
     loaded_count = 0
     error_count = 0
+    incident_rows = []
     
     try:
         for idx, row in df.iterrows():
@@ -205,25 +211,20 @@ def load_iom_data(csv_file=None, db_url=None):
                 
                 for field in ['origin_region']:
                     if field in row and pd.notna(row[field]):
-                        incident_data['migrant_origin_countries'] = str(row[field])[:200]
+                        incident_data['migrant_origin_countries'] = split_list(row[field])
                 
-                # Create incident
-                incident = SmugglingIncident(**incident_data)
-                session.add(incident)
-                loaded_count += 1
-                
-                # Commit in batches
-                if loaded_count % 100 == 0:
-                    session.commit()
-                    print(f"   Progress: {loaded_count:,}/{len(df):,} records...", end='\r')
+                incident_rows.append(incident_data)
                     
             except Exception as e:
                 error_count += 1
                 if error_count <= 3:  # Show first 3 errors
                     print(f"\n   ⚠️  Error on row {idx}: {e}")
         
-        # Final commit
-        session.commit()
+        # Insert in multi-row batches instead of one ORM object per row
+        for start in range(0, len(incident_rows), 10_000):
+            loaded_count += bulk_insert(session, SmugglingIncident, incident_rows[start:start + 10_000])
+            session.commit()
+            print(f"   Progress: {loaded_count:,}/{len(df):,} records...", end='\r')
         
         print(f"\n   ✓ Loaded {loaded_count:,} records successfully")
         if error_count > 0:
@@ -271,6 +272,10 @@ def load_iom_data(csv_file=None, db_url=None):
     
     session.close()
     
+    # Cached API responses still hold the old data
+    if clear_api_cache():
+        print("   ✓ API cache cleared")
+    
     print("\n" + "=" * 60)
     print("✅ DATA LOADING COMPLETE!")
     print("=" * 60)
@@ -12,15 +12,17 @@ Usage:
 
 import sys
 import os
-sys.path.append('src')
+# Repo root on the path; first-party code is imported as src.* everywhere
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import io
 import pandas as pd
 import numpy as np
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, insert, text
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime
 from dotenv import load_dotenv
-import re
+from src.models.models import EXTRACT_CITY_FUNCTION_SQL, INFER_NIBRS_CITIES_SQL, NIBRS_RISK_SCORE_MIGRATION_SQL, NIBRS_RISK_SCORE_SQL, NIBRSCrimeData, bulk_insert
+from src.extensions import clear_api_cache
 
 load_dotenv()
 
@@ -30,29 +32,48 @@ def clean_column_name(col):
     return col.replace('\n', ' ').strip()
 
 
-def extract_city_from_agency(agency_name):
+def insert_in_batches(session, rows, batch_size=10_000):
     """
-    Extract city name from agency name
-    E.g., "Apache Junction" from "Apache Junction Police Department"
-    """
-    if not agency_name or pd.isna(agency_name):
-        return None
-    
-    agency_name = str(agency_name).strip()
-    
-    # Remove common suffixes
-    suffixes = [
-        r' Police Department$', r' PD$', r" Sheriff's Office$", r' Sheriff Office$',
-        r' Sheriff$', r' Police$', r' Dept\.?$', r' Department$', 
-        r' City$', r' Town$', r' Village$', r' Borough$', r' Township$',
-        r' County$', r' Metro$', r' Metropolitan$'
-    ]
+    Insert NIBRS rows in multi-row batches
     
-    city = agency_name
-    for suffix in suffixes:
-        city = re.sub(suffix, '', city, flags=re.IGNORECASE).strip()
+    A batch that fails is retried row by row so one bad record only skips
+    itself.
     
-    return city if city and len(city) > 1 else None
+    Args:
+        session: Database session
+        rows: List of column-name -> value dicts
+        batch_size: Rows per INSERT batch
+        
+    Returns:
+        (loaded, errors) counts
+    """
+    loaded = 0
+    errors = 0
+    stmt = insert(NIBRSCrimeData.__table__)
+    
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        try:
+            loaded += bulk_insert(session, NIBRSCrimeData, batch, chunk_size=batch_size)
+            session.commit()
+        except Exception:
+            session.rollback()
+            for row in batch:
+                try:
+                    session.execute(stmt, row)
+                    session.commit()
+                    loaded += 1
+                except Exception as e:
+                    session.rollback()
+                    errors += 1
+                    if errors <= 5:
+                        print(f"\n   ⚠️  Error: {e}")
+                        print(f"      Agency: {row.get('agency_name', 'Unknown')}")
+                        print(f"      State: {row.get('state', 'Unknown')}")
+        
+        print(f"   Progress: {loaded:,}/{len(rows):,} records...", end='\r')
+    
+    return loaded, errors
 
 
 def load_nibrs_data(csv_file, db_url=None):
@@ -94,24 +115,12 @@ def load_nibrs_data(csv_file, db_url=None):
         print(f"   States: {df['state'].nunique()} unique")
         print(f"   Agencies: {df['agency name'].nunique():,} unique")
         
-        # Extract cities from agency names
-        print(f"\n3. Extracting cities from agency names...")
-        df['city'] = df['agency name'].apply(extract_city_from_agency)
-        cities_extracted = df['city'].notna().sum()
-        print(f"   ✓ Extracted {cities_extracted:,} cities ({cities_extracted/len(df)*100:.1f}%)")
-        
-        # Show top cities
-        top_cities = df[df['city'].notna()]['city'].value_counts().head(5)
-        print(f"\n   Top cities:")
-        for city, count in top_cities.items():
-            print(f"     - {city}: {count} records")
-        
     except Exception as e:
         print(f"   ❌ Error reading CSV: {e}")
         return False
     
     # Connect to database
-    print(f"\n4. Connecting to database...")
+    print(f"\n3. Connecting to database...")
     
     try:
         engine = create_engine(db_url, echo=False)
@@ -123,9 +132,9 @@ def load_nibrs_data(csv_file, db_url=None):
         return False
     
     # Create table if it doesn't exist
-    print(f"\n5. Creating NIBRS table...")
+    print(f"\n4. Creating NIBRS table...")
     
-    create_table_sql = """
+    create_table_sql = f"""
     CREATE TABLE IF NOT EXISTS nibrs_crime_data (
         id SERIAL PRIMARY KEY,
         year INTEGER NOT NULL,
@@ -136,6 +145,9 @@ def load_nibrs_data(csv_file, db_url=None):
         city VARCHAR(100),
         latitude FLOAT,
         longitude FLOAT,
+        geog geography(Point, 4326) GENERATED ALWAYS AS (
+            ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography
+        ) STORED,
         
         total_offenses INTEGER DEFAULT 0,
         crimes_against_persons INTEGER DEFAULT 0,
@@ -183,21 +195,34 @@ def load_nibrs_data(csv_file, db_url=None):
         
         violent_crime_rate FLOAT,
         property_crime_rate FLOAT,
-        overall_risk_score FLOAT,
+        overall_risk_score FLOAT GENERATED ALWAYS AS ({NIBRS_RISK_SCORE_SQL}) STORED,
         
         data_source VARCHAR(200) DEFAULT 'FBI NIBRS',
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
     );
     
-    CREATE INDEX IF NOT EXISTS idx_nibrs_year_state ON nibrs_crime_data(year, state);
-    CREATE INDEX IF NOT EXISTS idx_nibrs_location ON nibrs_crime_data(latitude, longitude);
+    -- A table from the previous loader keeps a plain overall_risk_score
+    -- that nothing fills any more; switch it to the generated column
+    -- before the indexes below are (re)built on it
+    {NIBRS_RISK_SCORE_MIGRATION_SQL}
+    
+    CREATE INDEX IF NOT EXISTS idx_nibrs_year_state ON nibrs_crime_data(year, state)
+        INCLUDE (total_offenses, overall_risk_score, violent_crime_rate);
+    CREATE INDEX IF NOT EXISTS idx_nibrs_geog ON nibrs_crime_data USING GIST (geog);
     CREATE INDEX IF NOT EXISTS idx_nibrs_agency ON nibrs_crime_data(agency_name, year);
     CREATE INDEX IF NOT EXISTS idx_nibrs_city ON nibrs_crime_data(city, state);
+    CREATE INDEX IF NOT EXISTS idx_nibrs_city_trgm ON nibrs_crime_data USING GIN (city gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS idx_nibrs_risk ON nibrs_crime_data(overall_risk_score);
+    CREATE INDEX IF NOT EXISTS idx_nibrs_year_state_risk ON nibrs_crime_data(year, state, overall_risk_score DESC)
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL;
+    CREATE INDEX IF NOT EXISTS idx_nibrs_high_risk ON nibrs_crime_data(overall_risk_score DESC, year)
+        WHERE overall_risk_score >= 50;
     """
     
     try:
         with engine.connect() as conn:
+            conn.exec_driver_sql(EXTRACT_CITY_FUNCTION_SQL)
             conn.execute(text(create_table_sql))
             conn.commit()
         print(f"   ✓ Table created/verified")
@@ -205,7 +230,7 @@ def load_nibrs_data(csv_file, db_url=None):
         print(f"   ⚠️  Table may already exist: {e}")
     
     # Ask about clearing existing data
-    print(f"\n6. Checking existing NIBRS data...")
+    print(f"\n5. Checking existing NIBRS data...")
     
     try:
         existing_count = session.execute(text(
@@ -229,7 +254,7 @@ def load_nibrs_data(csv_file, db_url=None):
         print(f"   ⚠️  Could not check existing data: {e}")
     
     # Load data
-    print(f"\n7. Loading {len(df):,} records into database...")
+    print(f"\n6. Loading {len(df):,} records into database...")
     
     loaded_count = 0
     error_count = 0
@@ -289,138 +314,108 @@ def load_nibrs_data(csv_file, db_url=None):
         'identity  theft': 'identity_theft',
     }
     
+    # Initialize all crime statistics with 0 (in case CSV column is missing)
+    all_crime_columns = [
+        'total_offenses', 'crimes_against_persons', 'crimes_against_property',
+        'crimes_against_society', 'assault_offenses', 'aggravated_assault',
+        'simple_assault', 'intimidation', 'homicide_offenses',
+        'murder_nonnegligent_manslaughter', 'negligent_manslaughter',
+        'justifiable_homicide', 'human_trafficking_offenses', 'commercial_sex_acts',
+        'involuntary_servitude', 'kidnapping_abduction', 'sex_offenses', 'rape',
+        'sodomy', 'sexual_assault_with_object', 'arson', 'burglary',
+        'larceny_theft', 'motor_vehicle_theft', 'robbery', 'vandalism',
+        'drug_narcotic_offenses', 'drug_violations', 'drug_equipment_violations',
+        'gambling_offenses', 'prostitution_offenses', 'weapons_violations',
+        'fraud_offenses', 'identity_theft'
+    ]
+    
+    # Build all rows column-wise; a year or count that is not a number
+    # makes its row an error, as int() did row by row
+    records = pd.DataFrame({
+        'year': pd.to_numeric(df['year'], errors='coerce'),
+        'state': df['state'].astype(str).str.strip().str.upper(),
+        'agency_type': df['agency type'].astype(str).where(df['agency type'].notna(), None),
+        'agency_name': df['agency name'].astype(str).str.strip(),
+        'city': df['city'] if 'city' in df.columns else None,
+    }, index=df.index)
+    bad = records['year'].isna()
+    
+    for col in all_crime_columns:
+        records[col] = 0
+    
+    # Add crime statistics from CSV (handle NaN and convert to int)
+    for csv_col, db_col in column_map.items():
+        if csv_col in df.columns:
+            values = pd.to_numeric(df[csv_col], errors='coerce')
+            bad |= values.isna() & df[csv_col].notna() & df[csv_col].astype(str).ne('')
+            records[db_col] = values.fillna(0)
+    
+    error_count = int(bad.sum())
+    for idx in df.index[bad][:5]:  # Show first 5 errors for debugging
+        print(f"\n   ⚠️  Error on row {idx}: non-numeric year or offense count")
+        print(f"      Agency: {df.at[idx, 'agency name']}")
+        print(f"      State: {df.at[idx, 'state']}")
+    
+    records = records[~bad]
+    records[['year'] + all_crime_columns] = records[['year'] + all_crime_columns].astype('int64')
+    
+    # COPY bypasses the model's Python-side defaults; the timestamps are
+    # left out and filled in by the server
+    records['data_source'] = 'FBI NIBRS'
+    
     try:
-        for idx, row in df.iterrows():
-            try:
-                # Build insert data with defaults
-                data = {
-                    'year': int(row['year']),
-                    'state': str(row['state']).strip().upper(),
-                    'agency_type': str(row['agency type']) if pd.notna(row['agency type']) else None,
-                    'agency_name': str(row['agency name']).strip(),
-                    'city': row.get('city'),
-                }
-                
-                # Initialize all crime statistics with 0 (in case CSV column is missing)
-                all_crime_columns = [
-                    'total_offenses', 'crimes_against_persons', 'crimes_against_property',
-                    'crimes_against_society', 'assault_offenses', 'aggravated_assault',
-                    'simple_assault', 'intimidation', 'homicide_offenses',
-                    'murder_nonnegligent_manslaughter', 'negligent_manslaughter',
-                    'justifiable_homicide', 'human_trafficking_offenses', 'commercial_sex_acts',
-                    'involuntary_servitude', 'kidnapping_abduction', 'sex_offenses', 'rape',
-                    'sodomy', 'sexual_assault_with_object', 'arson', 'burglary',
-                    'larceny_theft', 'motor_vehicle_theft', 'robbery', 'vandalism',
-                    'drug_narcotic_offenses', 'drug_violations', 'drug_equipment_violations',
-                    'gambling_offenses', 'prostitution_offenses', 'weapons_violations',
-                    'fraud_offenses', 'identity_theft'
-                ]
-                
-                # Set defaults
-                for col in all_crime_columns:
-                    data[col] = 0
-                
-                # Add crime statistics from CSV (handle NaN and convert to int)
-                for csv_col, db_col in column_map.items():
-                    if csv_col in row.index:
-                        val = row[csv_col]
-                        data[db_col] = int(val) if pd.notna(val) and val != '' else 0
-                
-                # Insert record
-                session.execute(text("""
-                    INSERT INTO nibrs_crime_data (
-                        year, state, agency_type, agency_name, city,
-                        total_offenses, crimes_against_persons, crimes_against_property,
-                        crimes_against_society, assault_offenses, aggravated_assault,
-                        simple_assault, intimidation, homicide_offenses, murder_nonnegligent_manslaughter,
-                        negligent_manslaughter, justifiable_homicide, human_trafficking_offenses,
-                        commercial_sex_acts, involuntary_servitude, kidnapping_abduction,
-                        sex_offenses, rape, sodomy, sexual_assault_with_object, arson, burglary,
-                        larceny_theft, motor_vehicle_theft, robbery, vandalism,
-                        drug_narcotic_offenses, drug_violations, drug_equipment_violations,
-                        gambling_offenses, prostitution_offenses, weapons_violations,
-                        fraud_offenses, identity_theft
-                    ) VALUES (
-                        :year, :state, :agency_type, :agency_name, :city,
-                        :total_offenses, :crimes_against_persons, :crimes_against_property,
-                        :crimes_against_society, :assault_offenses, :aggravated_assault,
-                        :simple_assault, :intimidation, :homicide_offenses, :murder_nonnegligent_manslaughter,
-                        :negligent_manslaughter, :justifiable_homicide, :human_trafficking_offenses,
-                        :commercial_sex_acts, :involuntary_servitude, :kidnapping_abduction,
-                        :sex_offenses, :rape, :sodomy, :sexual_assault_with_object, :arson, :burglary,
-                        :larceny_theft, :motor_vehicle_theft, :robbery, :vandalism,
-                        :drug_narcotic_offenses, :drug_violations, :drug_equipment_violations,
-                        :gambling_offenses, :prostitution_offenses, :weapons_violations,
-                        :fraud_offenses, :identity_theft
-                    )
-                """), data)
-                
-                loaded_count += 1
-                
-                # Commit each insert individually to avoid transaction failures cascading
-                # This is slower but more reliable with messy data
-                session.commit()
-                
-                # Progress indicator
-                if loaded_count % 100 == 0:
-                    print(f"   Progress: {loaded_count:,}/{len(df):,} records...", end='\r')
-                    
-            except Exception as e:
-                # CRITICAL: Rollback the transaction to prevent "current transaction is aborted" error
-                session.rollback()
-                
-                error_count += 1
-                if error_count <= 5:  # Show first 5 errors for debugging
-                    print(f"\n   ⚠️  Error on row {idx}: {e}")
-                    print(f"      Agency: {row.get('agency name', 'Unknown')}")
-                    print(f"      State: {row.get('state', 'Unknown')}")
-                    print(f"      Rolling back and continuing...")
-        
-        # Final commit
-        session.commit()
-        
-        print(f"\n   ✓ Loaded {loaded_count:,} records successfully")
-        if error_count > 0:
-            print(f"   ⚠️  {error_count} records had errors (skipped)")
+        # COPY the whole frame in one round trip
+        buf = io.StringIO()
+        records.to_csv(buf, index=False, header=False)
+        buf.seek(0)
+        
+        raw_conn = engine.raw_connection()
+        try:
+            with raw_conn.cursor() as cur:
+                cur.copy_expert(
+                    f"COPY nibrs_crime_data ({', '.join(records.columns)}) FROM STDIN WITH (FORMAT csv)",
+                    buf
+                )
+            raw_conn.commit()
+        finally:
+            raw_conn.close()
+        
+        loaded_count = len(records)
     
     except Exception as e:
-        print(f"\n   ❌ Error during loading: {e}")
-        session.rollback()
-        return False
+        # COPY is all-or-nothing; redo with batched INSERTs, isolating bad rows
+        print(f"   ⚠️  COPY failed ({e}), falling back to batched inserts...")
+        loaded_count, insert_errors = insert_in_batches(session, records.to_dict('records'))
+        error_count += insert_errors
+    
+    print(f"\n   ✓ Loaded {loaded_count:,} records successfully")
+    if error_count > 0:
+        print(f"   ⚠️  {error_count} records had errors (skipped)")
     
-    # Calculate risk scores
-    print(f"\n8. Calculating risk scores...")
+    # Risk scores are a generated column, computed by PostgreSQL on insert
+    
+    # Cities are inferred from the agency names in the database
+    print(f"\n7. Inferring cities from agency names...")
     
     try:
-        # Update risk scores using SQL
-        session.execute(text("""
-            UPDATE nibrs_crime_data
-            SET overall_risk_score = CASE 
-                WHEN total_offenses > 0 THEN 
-                    LEAST(
-                        (
-                            (murder_nonnegligent_manslaughter * 10.0) +
-                            (aggravated_assault * 5.0) +
-                            (rape * 5.0) +
-                            (robbery * 3.0) +
-                            (kidnapping_abduction * 8.0) +
-                            (human_trafficking_offenses * 10.0) +
-                            (drug_narcotic_offenses * 2.0) +
-                            (burglary * 0.5)
-                        ) / (total_offenses * 10.0) * 100,
-                        100
-                    )
-                ELSE 0
-            END
-            WHERE overall_risk_score IS NULL
-        """))
+        result = session.execute(text(INFER_NIBRS_CITIES_SQL))
         session.commit()
-        print(f"   ✓ Risk scores calculated")
+        print(f"   ✓ Inferred {result.rowcount:,} cities")
+        
+        top_cities = session.execute(text("""
+            SELECT city, COUNT(*) FROM nibrs_crime_data
+            WHERE city IS NOT NULL
+            GROUP BY city ORDER BY COUNT(*) DESC LIMIT 5
+        """)).fetchall()
+        print(f"\n   Top cities:")
+        for city, count in top_cities:
+            print(f"     - {city}: {count} records")
     except Exception as e:
-        print(f"   ⚠️  Could not calculate risk scores: {e}")
+        session.rollback()
+        print(f"   ⚠️  Could not infer cities: {e}")
     
     # Show statistics
-    print(f"\n9. Database Summary:")
+    print(f"\n8. Database Summary:")
     
     try:
         total = session.execute(text("SELECT COUNT(*) FROM nibrs_crime_data")).scalar()
@@ -440,7 +435,7 @@ def load_nibrs_data(csv_file, db_url=None):
         print(f"   - Agencies: {agencies:,}")
         
         # Top high-risk agencies
-        print(f"\n10. Top 10 Highest Risk Agencies:")
+        print(f"\n9. Top 10 Highest Risk Agencies:")
         high_risk = session.execute(text("""
             SELECT agency_name, city, state, year, 
                    total_offenses, overall_risk_score
@@ -460,6 +455,10 @@ def load_nibrs_data(csv_file, db_url=None):
     
     session.close()
     
+    # Cached API responses still hold the old data
+    if clear_api_cache():
+        print("   ✓ API cache cleared")
+    
     print("\n" + "=" * 80)
     print("✅ NIBRS DATA LOADING COMPLETE!")
     print("=" * 80)
@@ -6,12 +6,13 @@ Place in: scripts/load_venues_postgresql.py
 
 import sys
 import os
-sys.path.append('src')
+# Repo root on the path; first-party code is imported as src.* everywhere
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, func
 from sqlalchemy.orm import sessionmaker
-from models.models import WorldCupVenue
-from datetime import datetime
+from src.models.models import WorldCupVenue
+from src.extensions import clear_api_cache
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -77,7 +78,7 @@ def load_venues(db_url=None):
             for key, value in venue_dict.items():
                 if hasattr(existing, key):
                     setattr(existing, key, value)
-            existing.updated_at = datetime.utcnow()
+            existing.updated_at = func.now()
             updated_count += 1
             print(f"   ✓ Updated: {venue_dict['venue_name']}")
         else:
@@ -104,6 +105,11 @@ def load_venues(db_url=None):
     
     session.close()
     
+    # Cached /api/venues responses still hold the old venues; app workers
+    # re-read their venue arrays within VENUE_CACHE_SECONDS
+    if clear_api_cache():
+        print("   ✓ API cache cleared")
+    
     print("\n" + "=" * 60)
     print("✓ VENUES LOADED SUCCESSFULLY!")
     print("=" * 60)
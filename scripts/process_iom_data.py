@@ -1,10 +1,12 @@
 """
 Process manually downloaded IOM data
 """
+import os
 import sys
-sys.path.append('src')
+# Repo root on the path; first-party code is imported as src.* everywhere
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from scrapers.iom_scraper import IOMMigrantsScraper
+from src.scrapers.iom_scraper import IOMMigrantsScraper
 
 # Create scraper instance
 scraper = IOMMigrantsScraper()
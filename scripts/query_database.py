@@ -1,9 +1,11 @@
+import os
 import sys
-sys.path.append('src')
+# Repo root on the path; first-party code is imported as src.* everywhere
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from models.models import SmugglingIncident, DataSource
+from src.models.models import SmugglingIncident, DataSource
 
 engine = create_engine('sqlite:///worldcup_intelligence.db')
 Session = sessionmaker(bind=engine)
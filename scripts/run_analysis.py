@@ -4,123 +4,160 @@ Run Geospatial Analysis and Generate Reports
 Place in: scripts/run_analysis.py
 """
 
+import os
 import sys
-sys.path.append('src')
+# Repo root on the path; first-party code is imported as src.* everywhere
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.geo_analysis import GeospatialAnalyzer
-import json
+from src.utils.geo_analysis import GeospatialAnalyzer
+from src.models.models import risk_level_enum
+import numpy as np
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 from datetime import datetime
+from functools import partial
+import io
 import os
 
+SEP = '=' * 80
+
+
+def save_table(table, csv_file):
+    """Write an Arrow table as CSV plus a Parquet copy alongside it"""
+    pacsv.write_csv(table, csv_file)
+    pq.write_table(table, csv_file.replace('.csv', '.parquet'), compression='zstd')
+
 
 def main():
     """Run complete geospatial analysis"""
     
-    print("=" * 80)
+    print(SEP)
     print("WORLD CUP 2026 - GEOSPATIAL INTELLIGENCE ANALYSIS")
-    print("=" * 80)
+    print(SEP)
     
     analyzer = GeospatialAnalyzer()
     
+    # Load incidents once and share the frame across every analysis below
+    incidents = analyzer.load_incidents()
+    
     # 1. Summary Report
     print("\n📊 GENERATING SUMMARY REPORT...")
-    summary = analyzer.generate_summary_report()
-    
-    print(f"\n{'='*80}")
-    print("OVERVIEW")
-    print(f"{'='*80}")
-    print(f"Total World Cup Venues: {summary['overview']['total_venues']}")
-    print(f"Total Incidents Analyzed: {summary['overview']['total_incidents']:,}")
-    print(f"Total Casualties (Dead + Missing): {summary['overview']['total_casualties']:,}")
-    print(f"  - Dead: {summary['overview']['total_dead']:,}")
-    print(f"  - Missing: {summary['overview']['total_missing']:,}")
-    print(f"Date Range: {summary['overview']['date_range']['earliest']} to {summary['overview']['date_range']['latest']}")
+    summary = analyzer.generate_summary_report(incidents=incidents)
+    
+    # Buffer the report sections and write them to stdout in one call
+    buf = io.StringIO()
+    emit = partial(print, file=buf)
+    
+    emit("\n" + SEP)
+    emit("OVERVIEW")
+    emit(SEP)
+    emit(f"Total World Cup Venues: {summary['overview']['total_venues']}")
+    emit(f"Total Incidents Analyzed: {summary['overview']['total_incidents']:,}")
+    emit(f"Total Casualties (Dead + Missing): {summary['overview']['total_casualties']:,}")
+    emit(f"  - Dead: {summary['overview']['total_dead']:,}")
+    emit(f"  - Missing: {summary['overview']['total_missing']:,}")
+    emit(f"Date Range: {summary['overview']['date_range']['earliest']} to {summary['overview']['date_range']['latest']}")
     
     # 2. Hotspot Analysis
-    print(f"\n{'='*80}")
-    print("TOP 10 SMUGGLING HOTSPOTS")
-    print(f"{'='*80}")
+    emit("\n" + SEP)
+    emit("TOP 10 SMUGGLING HOTSPOTS")
+    emit(SEP)
     
     for idx, hotspot in enumerate(summary['hotspots'][:10], 1):
-        print(f"\n{idx}. Location: ({hotspot['latitude']:.2f}, {hotspot['longitude']:.2f})")
-        print(f"   Incidents: {hotspot['incident_count']}")
-        print(f"   Casualties: {hotspot['total_casualties']} (Dead: {hotspot['total_dead']}, Missing: {hotspot['total_missing']})")
+        emit(f"\n{idx}. Location: ({hotspot['latitude']:.2f}, {hotspot['longitude']:.2f})")
+        emit(f"   Incidents: {hotspot['incident_count']}")
+        emit(f"   Casualties: {hotspot['total_casualties']} (Dead: {hotspot['total_dead']}, Missing: {hotspot['total_missing']})")
     
     # 3. Venue Risk Assessment
-    print(f"\n{'='*80}")
-    print("VENUE RISK ASSESSMENT")
-    print(f"{'='*80}")
+    emit("\n" + SEP)
+    emit("VENUE RISK ASSESSMENT")
+    emit(SEP)
     
     risk_summary = summary['venue_risk_summary']
-    print(f"\nRisk Distribution:")
-    print(f"  🔴 High Risk: {risk_summary['High']} venues")
-    print(f"  🟡 Medium Risk: {risk_summary['Medium']} venues")
-    print(f"  🟢 Low Risk: {risk_summary['Low']} venues")
+    emit(f"\nRisk Distribution:")
+    emit(f"  🔴 High Risk: {risk_summary['High']} venues")
+    emit(f"  🟡 Medium Risk: {risk_summary['Medium']} venues")
+    emit(f"  🟢 Low Risk: {risk_summary['Low']} venues")
     
-    print(f"\n{'='*80}")
-    print("HIGH RISK VENUES (Detailed Analysis)")
-    print(f"{'='*80}")
+    emit("\n" + SEP)
+    emit("HIGH RISK VENUES (Detailed Analysis)")
+    emit(SEP)
     
     if summary['high_risk_venues']:
         for venue in summary['high_risk_venues']:
-            print(f"\n🏟️  {venue['venue_name']}")
-            print(f"   Location: {venue['city']}, {venue['country']}")
-            print(f"   Current Risk Level: {venue['current_risk_level']}")
-            print(f"   Calculated Risk Score: {venue['calculated_risk_score']}/100")
-            print(f"   Incidents within 100km: {venue['incidents_within_100km']}")
-            print(f"   Total Casualties Nearby: {venue['total_casualties_nearby']}")
-            if venue['closest_incident_km']:
-                print(f"   Closest Incident: {venue['closest_incident_km']:.1f} km away")
+            emit(f"\n🏟️  {venue['venue_name']}")
+            emit(f"   Location: {venue['city']}, {venue['country']}")
+            emit(f"   Current Risk Level: {venue['current_risk_level']}")
+            emit(f"   Calculated Risk Score: {venue['calculated_risk_score']}/100")
+            emit(f"   Incidents within 100km: {venue['incidents_within_100km']}")
+            emit(f"   Total Casualties Nearby: {venue['total_casualties_nearby']}")
+            if venue['closest_incident_km'] is not None:
+                emit(f"   Closest Incident: {venue['closest_incident_km']:.1f} km away")
     else:
-        print("\n✓ No high-risk venues identified")
+        emit("\n✓ No high-risk venues identified")
     
     # 4. Detailed Venue Analysis
-    print(f"\n{'='*80}")
-    print("ANALYZING ALL VENUES (50km radius)")
-    print(f"{'='*80}")
-    
-    venue_analysis = analyzer.analyze_all_venues(radius_km=50)
-    
-    # Create summary table
-    venue_data = []
-    for venue_name, data in venue_analysis.items():
-        venue_data.append({
-            'Venue': venue_name,
-            'City': data['city'],
-            'Country': data['country'],
-            'Risk Level': data['security_risk_level'],
-            'Incidents (50km)': data['incidents_within_radius'],
-            'Casualties': data['total_casualties'],
-            'Closest (km)': data['closest_incident_km'] if data['closest_incident_km'] else 'N/A'
-        })
-    
-    df_venues = pd.DataFrame(venue_data)
+    emit("\n" + SEP)
+    emit("ANALYZING ALL VENUES (50km radius)")
+    emit(SEP)
+    
+    venue_analysis = analyzer.analyze_all_venues(radius_km=50, incidents=incidents)
+    
+    # Create summary table (built column-wise, no intermediate list of dicts)
+    items = list(venue_analysis.items())
+    df_venues = pd.DataFrame({
+        'Venue': [name for name, _ in items],
+        'City': [data['city'] for _, data in items],
+        'Country': [data['country'] for _, data in items],
+        'Risk Level': pd.Categorical(
+            [data['security_risk_level'] for _, data in items],
+            categories=risk_level_enum.enums
+        ),
+        'Incidents (50km)': np.fromiter(
+            (data['incidents_within_radius'] for _, data in items),
+            dtype=np.int32, count=len(items)
+        ),
+        'Casualties': np.fromiter(
+            (data['total_casualties'] for _, data in items),
+            dtype=np.int32, count=len(items)
+        ),
+        'Closest (km)': np.fromiter(
+            (np.nan if data['closest_incident_km'] is None else data['closest_incident_km']
+             for _, data in items),
+            dtype=np.float64, count=len(items)
+        )
+    })
     df_venues = df_venues.sort_values('Incidents (50km)', ascending=False)
     
-    print("\n" + df_venues.to_string(index=False))
+    emit("\n" + df_venues.to_string(index=False, na_rep='N/A'))
     
     # 5. Temporal Analysis
-    print(f"\n{'='*80}")
-    print("TEMPORAL TREND ANALYSIS")
-    print(f"{'='*80}")
+    emit("\n" + SEP)
+    emit("TEMPORAL TREND ANALYSIS")
+    emit(SEP)
     
-    temporal = analyzer.temporal_analysis()
+    temporal = analyzer.temporal_analysis(incidents=incidents)
     
-    print(f"\nTotal Incidents Analyzed: {temporal['total_incidents']:,}")
-    print(f"Date Range: {temporal['date_range']['start']} to {temporal['date_range']['end']}")
+    emit(f"\nTotal Incidents Analyzed: {temporal['total_incidents']:,}")
+    emit(f"Date Range: {temporal['date_range']['start']} to {temporal['date_range']['end']}")
     
     # Show recent trends (last 12 months if available)
     recent_trends = temporal['monthly_trends'][-12:]
-    print(f"\nRecent Monthly Trends (Last {len(recent_trends)} months):")
+    emit(f"\nRecent Monthly Trends (Last {len(recent_trends)} months):")
     for trend in recent_trends:
-        print(f"  {trend['year']}-{trend['month']:02d}: {trend['incident_count']} incidents, "
+        emit(f"  {trend['year']}-{trend['month']:02d}: {trend['incident_count']} incidents, "
               f"{trend['total_dead']} dead, {trend['total_missing']} missing")
     
+    sys.stdout.write(buf.getvalue())
+    sys.stdout.flush()
+    
     # 6. Save Reports
-    print(f"\n{'='*80}")
+    print("\n" + SEP)
     print("SAVING REPORTS")
-    print(f"{'='*80}")
+    print(SEP)
     
     # Create reports directory
     os.makedirs('reports', exist_ok=True)
@@ -129,30 +166,32 @@ def main():
     
     # Save summary as JSON
     summary_file = f'reports/summary_report_{timestamp}.json'
-    with open(summary_file, 'w') as f:
-        json.dump(summary, f, indent=2, default=str)
+    with open(summary_file, 'wb') as f:
+        f.write(orjson.dumps(
+            summary,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+            default=str
+        ))
     print(f"✓ Summary report saved: {summary_file}")
     
-    # Save venue analysis as CSV
+    # Save venue analysis as CSV + Parquet
     venue_file = f'reports/venue_analysis_{timestamp}.csv'
-    df_venues.to_csv(venue_file, index=False)
+    save_table(pa.Table.from_pandas(df_venues, preserve_index=False), venue_file)
     print(f"✓ Venue analysis saved: {venue_file}")
     
-    # Save temporal trends as CSV
+    # Save temporal trends as CSV + Parquet
     temporal_file = f'reports/temporal_trends_{timestamp}.csv'
-    df_temporal = pd.DataFrame(temporal['monthly_trends'])
-    df_temporal.to_csv(temporal_file, index=False)
+    save_table(pa.Table.from_pylist(temporal['monthly_trends']), temporal_file)
     print(f"✓ Temporal trends saved: {temporal_file}")
     
-    # Save hotspots as CSV
+    # Save hotspots as CSV + Parquet
     hotspot_file = f'reports/hotspots_{timestamp}.csv'
-    df_hotspots = pd.DataFrame(summary['hotspots'])
-    df_hotspots.to_csv(hotspot_file, index=False)
+    save_table(pa.Table.from_pylist(summary['hotspots']), hotspot_file)
     print(f"✓ Hotspots saved: {hotspot_file}")
     
-    print(f"\n{'='*80}")
+    print("\n" + SEP)
     print("✓ ANALYSIS COMPLETE!")
-    print(f"{'='*80}")
+    print(SEP)
     print(f"\nReports saved to: reports/")
     print(f"\nKey Findings:")
     print(f"  • {summary['overview']['total_incidents']:,} incidents analyzed")
@@ -6,16 +6,21 @@ Place in: scripts/scheduler.py
 """
 
 from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.triggers.cron import CronTrigger
+from concurrent.futures import ThreadPoolExecutor as FuturesThreadPoolExecutor, as_completed
 from datetime import datetime
 import sys
 import os
 import logging
 
-sys.path.append('src')
+# Repo root on the path; first-party code is imported as src.* everywhere
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from scrapers.iom_scraper import IOMMigrantsScraper
-from scrapers.cbp_scraper import CBPScraper
+from src.scrapers.iom_scraper import IOMMigrantsScraper
+from src.scrapers.cbp_scraper import CBPScraper
+from src.utils.geo_analysis import GeospatialAnalyzer, get_engine
+from src.models.models import REFRESH_VENUE_NEAREST_CROSSING_SQL
 
 # Set up logging
 logging.basicConfig(
@@ -28,7 +33,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-
 def scrape_iom_data():
     """Scheduled task: Scrape IOM data"""
     logger.info("=" * 60)
@@ -96,10 +100,21 @@ def generate_daily_report():
     logger.info("=" * 60)
     
     try:
-        # TODO: Query database and generate report
         logger.info("Generating daily report...")
         
-        # Placeholder for now
+        # A fresh analyzer per run, so the report sees newly loaded data; the
+        # engine (and its connection pool) is shared through get_engine()
+        analyzer = GeospatialAnalyzer()
+        try:
+            summary = analyzer.generate_summary_report()
+        finally:
+            analyzer.close()
+        
+        overview = summary['overview']
+        logger.info(f"  Venues: {overview['total_venues']}")
+        logger.info(f"  Incidents: {overview['total_incidents']}")
+        logger.info(f"  Casualties: {overview['total_casualties']}")
+        
         logger.info(f"Report generated at: {datetime.now()}")
         
     except Exception as e:
@@ -108,6 +123,24 @@ def generate_daily_report():
     logger.info("=" * 60)
 
 
+def refresh_venue_crossings():
+    """Scheduled task: Refresh venue -> nearest border crossing distances"""
+    logger.info("=" * 60)
+    logger.info("SCHEDULED TASK: Venue Border Proximity Refresh")
+    logger.info("=" * 60)
+    
+    try:
+        with get_engine().begin() as conn:
+            conn.exec_driver_sql(REFRESH_VENUE_NEAREST_CROSSING_SQL)
+        
+        logger.info("✓ venue_nearest_crossing refreshed")
+        
+    except Exception as e:
+        logger.error(f"✗ Error refreshing venue crossings: {e}")
+    
+    logger.info("=" * 60)
+
+
 def setup_scheduler():
     """Configure and start the scheduler"""
     
@@ -119,7 +152,16 @@ def setup_scheduler():
     os.makedirs('logs', exist_ok=True)
     
     # Create scheduler
-    scheduler = BlockingScheduler()
+    # Jobs run on a thread pool so overlapping cron windows don't block each
+    # other; coalesce collapses missed runs after downtime into a single run
+    scheduler = BlockingScheduler(
+        executors={'default': ThreadPoolExecutor(20)},
+        job_defaults={
+            'coalesce': True,
+            'max_instances': 1,
+            'misfire_grace_time': 3600
+        }
+    )
     
     # Schedule IOM scraping - Weekly on Monday at 2 AM
     scheduler.add_job(
@@ -141,6 +183,16 @@ def setup_scheduler():
     )
     logger.info("✓ Scheduled: CBP scraping - 1st of each month at 3:00 AM")
     
+    # Refresh venue border proximity - Every night at 1 AM
+    scheduler.add_job(
+        refresh_venue_crossings,
+        CronTrigger(hour=1, minute=0),
+        id='venue_crossings_refresh',
+        name='Venue Border Proximity Refresh',
+        replace_existing=True
+    )
+    logger.info("✓ Scheduled: Venue border proximity - Every day at 1:00 AM")
+    
     # Schedule daily report - Every day at 9 AM
     scheduler.add_job(
         generate_daily_report,
@@ -178,13 +230,15 @@ def run_manual_test():
     logger.info("MANUAL TEST MODE - Running All Tasks Once")
     logger.info("=" * 60)
     
-    # Run IOM scraping
-    logger.info("\nTask 1/3: IOM Data Scraping")
-    scrape_iom_data()
-    
-    # Run CBP scraping
-    logger.info("\nTask 2/3: CBP Data Scraping")
-    scrape_cbp_data()
+    # Run IOM and CBP scraping concurrently (independent network-bound jobs)
+    logger.info("\nTasks 1-2/3: IOM and CBP Data Scraping")
+    with FuturesThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(scrape_iom_data),
+            executor.submit(scrape_cbp_data)
+        ]
+        for future in as_completed(futures):
+            future.result()
     
     # Run report generation
     logger.info("\nTask 3/3: Daily Report")
@@ -6,15 +6,113 @@ Run this from the scripts directory:
     python setup_iom_americas.py
 """
 
+import io
 import os
+import shutil
 import sys
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from datetime import datetime
+from functools import partial
+
+# Raw IOM column names -> our column names
+COLUMN_MAPPING = {
+    'Main ID': 'incident_id',
+    'Incident Date': 'incident_date',
+    'Reported Date': 'reported_date',
+    'Number Dead': 'number_dead',
+    'Minimum Estimated Number of Missing': 'number_missing',
+    'Total Dead and Missing': 'total_dead_missing',
+    'Number of Survivors': 'number_survivors',
+    'Cause of Death': 'cause_of_death',
+    'Region of Origin': 'origin_region',
+    'Migration Route': 'migration_route',
+    'Location Description': 'location_description',
+    'Region of Incident': 'region_of_incident',
+    'Coordinates': 'coordinates',
+    'Information Source Quality': 'source_quality'
+}
+
+# Declared dtypes skip type inference on the columns we keep
+COLUMN_DTYPES = {
+    'Main ID': 'string',
+    'Incident Date': 'string',
+    'Reported Date': 'string',
+    'Number Dead': 'string',
+    'Minimum Estimated Number of Missing': 'string',
+    'Total Dead and Missing': 'string',
+    'Number of Survivors': 'string',
+    'Cause of Death': 'string',
+    'Region of Origin': 'string',
+    'Migration Route': 'string[pyarrow]',
+    'Location Description': 'string',
+    'Region of Incident': 'string[pyarrow]',
+    'Coordinates': 'string',
+    'Information Source Quality': 'string'
+}
+
+AMERICAS_KEYWORDS = [
+    'north america', 'central america', 'south america', 'caribbean',
+    'us-mexico', 'mexico', 'united states', 'canada', 'guatemala',
+    'honduras', 'el salvador', 'nicaragua', 'costa rica', 'panama',
+    'colombia', 'venezuela', 'ecuador', 'peru', 'brazil', 'chile',
+    'argentina', 'cuba', 'haiti', 'dominican republic', 'jamaica',
+]
+
+# One case-insensitive alternation scanned by Arrow's regex kernel instead
+# of a Python loop over every keyword (keywords are plain letters, spaces
+# and hyphens, so they need no escaping)
+AMERICAS_REGEX = '|'.join(AMERICAS_KEYWORDS)
+
+# Rows read per chunk, bounds peak memory for large IOM exports
+CHUNK_SIZE = 200_000
+
 
 def check_file_exists(filepath):
     """Check if a file exists"""
     return os.path.exists(filepath)
 
+def process_chunk(df):
+    """Rename columns and parse dates, coordinates and counts for one chunk"""
+    df = df.rename(columns=COLUMN_MAPPING)
+    
+    # Parse dates
+    if 'incident_date' in df.columns:
+        df['incident_date'] = pd.to_datetime(df['incident_date'], errors='coerce', cache=True)
+        df['incident_year'] = df['incident_date'].dt.year.astype('Int64')
+        df['incident_month'] = df['incident_date'].dt.month.astype('Int64')
+    
+    # Parse coordinates ("lat, lon") with one numpy partition on the comma,
+    # missing values become empty strings and coerce to NaN
+    if 'coordinates' in df.columns:
+        coords = np.char.partition(df['coordinates'].fillna('').to_numpy(dtype=str), ',')
+        df['latitude'] = pd.to_numeric(coords[:, 0], errors='coerce')
+        df['longitude'] = pd.to_numeric(coords[:, 2], errors='coerce')
+    
+    # Counts are read as strings: non-numeric cells ("1,200", "Unknown")
+    # coerce to NaN instead of failing the read, then fill and narrow to int32
+    count_cols = [col for col in ('number_dead', 'number_missing', 'number_survivors') if col in df.columns]
+    df[count_cols] = df[count_cols].apply(pd.to_numeric, errors='coerce').fillna(0).astype('int32')
+    if 'total_dead_missing' in df.columns:
+        df['total_dead_missing'] = pd.to_numeric(df['total_dead_missing'], errors='coerce')
+    
+    return df
+
+def filter_americas(df, region_col):
+    """Keep Americas rows, by region keywords or by coordinates"""
+    if region_col:
+        regions = pa.array(df[region_col].astype('string[pyarrow]'))
+        mask = pc.match_substring_regex(regions, AMERICAS_REGEX, ignore_case=True)
+        return df[mask.fill_null(False).to_numpy(zero_copy_only=False)]
+    
+    return df[
+        (df['latitude'].between(-60, 80)) & 
+        (df['longitude'].between(-170, -30))
+    ]
+
 def main():
     print("""
     ╔════════════════════════════════════════════════════════════════════╗
@@ -43,179 +141,187 @@ def main():
             break
     
     if not raw_file:
-        print("❌ No IOM data file found!\n")
-        print("=" * 70)
-        print("DOWNLOAD INSTRUCTIONS")
-        print("=" * 70)
-        print("\n📥 Please download the IOM data manually:\n")
-        print("1. Open your browser and go to:")
-        print("   https://missingmigrants.iom.int/downloads\n")
-        print("2. Click the 'Download Data' button")
-        print("   (It will download a CSV file)\n")
-        print("3. Save the file to one of these locations:")
+        # Instructions go out in one write
+        buf = io.StringIO()
+        emit = partial(print, file=buf)
+        
+        emit("❌ No IOM data file found!\n")
+        emit("=" * 70)
+        emit("DOWNLOAD INSTRUCTIONS")
+        emit("=" * 70)
+        emit("\n📥 Please download the IOM data manually:\n")
+        emit("1. Open your browser and go to:")
+        emit("   https://missingmigrants.iom.int/downloads\n")
+        emit("2. Click the 'Download Data' button")
+        emit("   (It will download a CSV file)\n")
+        emit("3. Save the file to one of these locations:")
         for fp in possible_files[:2]:
-            print(f"   - {fp}")
-        print("\n4. Then run this script again:")
-        print("   python setup_iom_americas.py\n")
-        print("=" * 70)
+            emit(f"   - {fp}")
+        emit("\n4. Then run this script again:")
+        emit("   python setup_iom_americas.py\n")
+        emit("=" * 70)
+        
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
         return False
     
     # Step 2: Process the raw file
     print(f"\nStep 2: Processing IOM data...\n")
     
     try:
-        # Read the raw CSV
+        # Read the header first, then only the mapped columns
         print(f"Reading: {raw_file}")
-        df_raw = pd.read_csv(raw_file, encoding='utf-8-sig')
-        print(f"✓ Loaded {len(df_raw):,} records")
-        
-        # Show columns
-        print(f"\nColumns found: {len(df_raw.columns)}")
-        print(f"  {', '.join(df_raw.columns[:5])}...")
-        
-        # Clean and process
-        print("\nProcessing data...")
-        
-        # Column mapping
-        column_mapping = {
-            'Main ID': 'incident_id',
-            'Incident Date': 'incident_date',
-            'Reported Date': 'reported_date',
-            'Number Dead': 'number_dead',
-            'Minimum Estimated Number of Missing': 'number_missing',
-            'Total Dead and Missing': 'total_dead_missing',
-            'Number of Survivors': 'number_survivors',
-            'Cause of Death': 'cause_of_death',
-            'Region of Origin': 'origin_region',
-            'Migration Route': 'migration_route',
-            'Location Description': 'location_description',
-            'Region of Incident': 'region_of_incident',
-            'Coordinates': 'coordinates',
-            'Information Source Quality': 'source_quality'
-        }
-        
-        # Rename columns
-        existing_cols = {k: v for k, v in column_mapping.items() if k in df_raw.columns}
-        df = df_raw.rename(columns=existing_cols)
-        
-        # Parse dates
-        if 'incident_date' in df.columns:
-            df['incident_date'] = pd.to_datetime(df['incident_date'], errors='coerce')
-            df['incident_year'] = df['incident_date'].dt.year
-            df['incident_month'] = df['incident_date'].dt.month
-        
-        # Parse coordinates
-        if 'coordinates' in df.columns:
-            coords = df['coordinates'].str.split(',', expand=True)
-            if coords.shape[1] >= 2:
-                df['latitude'] = pd.to_numeric(coords[0], errors='coerce')
-                df['longitude'] = pd.to_numeric(coords[1], errors='coerce')
-        
-        # Convert numeric columns
-        for col in ['number_dead', 'number_missing', 'number_survivors']:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
-        
-        print(f"✓ Processed {len(df):,} records")
+        header = pd.read_csv(raw_file, encoding='utf-8-sig', nrows=0).columns
+        usecols = [col for col in COLUMN_MAPPING if col in header]
         
-        # Step 3: Filter for Americas
-        print(f"\nStep 3: Filtering for Americas regions...\n")
+        print(f"\nColumns found: {len(header)} (using {len(usecols)})")
+        print(f"  {', '.join(usecols[:5])}...")
         
         # Find region column
+        renamed_cols = [COLUMN_MAPPING[col] for col in usecols]
         region_col = None
-        for col in ['region_of_incident', 'Region of Incident', 'migration_route', 'Migration Route']:
-            if col in df.columns:
+        for col in ['region_of_incident', 'migration_route']:
+            if col in renamed_cols:
                 region_col = col
                 break
         
+        os.makedirs('data/processed', exist_ok=True)
+        full_output = 'data/processed/iom_processed.csv'
+        # Typed copy for the loaders, no re-parsing or dtype inference
+        full_parquet = 'data/processed/iom_processed.parquet'
+        
+        # Process chunk by chunk: the full processed data is appended to disk
+        # and only the Americas rows are kept in memory
+        print("\nProcessing data...")
+        total_records = 0
+        region_counts = pd.Series(dtype='int64')
+        americas_chunks = []
+        parquet_writer = None
+        
+        try:
+            with pd.read_csv(
+                raw_file,
+                encoding='utf-8-sig',
+                usecols=usecols,
+                dtype={col: COLUMN_DTYPES[col] for col in usecols},
+                chunksize=CHUNK_SIZE
+            ) as reader:
+                for i, chunk in enumerate(reader):
+                    chunk = process_chunk(chunk)
+                    total_records += len(chunk)
+                    
+                    chunk.to_csv(full_output, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+                    
+                    table = pa.Table.from_pandas(
+                        chunk,
+                        schema=parquet_writer.schema if parquet_writer else None,
+                        preserve_index=False
+                    )
+                    if parquet_writer is None:
+                        parquet_writer = pq.ParquetWriter(full_parquet, table.schema, compression='zstd')
+                    parquet_writer.write_table(table)
+                    
+                    if region_col:
+                        region_counts = region_counts.add(chunk[region_col].value_counts(), fill_value=0)
+                    
+                    americas_chunks.append(filter_americas(chunk, region_col))
+        finally:
+            if parquet_writer is not None:
+                parquet_writer.close()
+        
+        if americas_chunks:
+            df_americas = pd.concat(americas_chunks, copy=False)
+        else:
+            df_americas = pd.DataFrame(columns=renamed_cols)
+        
+        # Filter report goes out in one write
+        buf = io.StringIO()
+        emit = partial(print, file=buf)
+        
+        emit(f"✓ Processed {total_records:,} records")
+        
+        # Step 3: Filter for Americas
+        emit(f"\nStep 3: Filtering for Americas regions...\n")
+        
         if region_col:
-            print(f"Using region column: {region_col}")
+            emit(f"Using region column: {region_col}")
             
             # Show unique regions
-            unique_regions = df[region_col].dropna().unique()
-            print(f"\nRegions in data ({len(unique_regions)}):")
-            for region in sorted(unique_regions)[:10]:
-                count = len(df[df[region_col] == region])
-                print(f"  - {region}: {count:,} records")
-            if len(unique_regions) > 10:
-                print(f"  ... and {len(unique_regions) - 10} more")
-            
-            # Filter for Americas
-            americas_keywords = [
-                'north america', 'central america', 'south america', 'caribbean',
-                'us-mexico', 'mexico', 'united states', 'canada', 'guatemala',
-                'honduras', 'el salvador', 'nicaragua', 'costa rica', 'panama',
-                'colombia', 'venezuela', 'ecuador', 'peru', 'brazil', 'chile',
-                'argentina', 'cuba', 'haiti', 'dominican republic', 'jamaica',
-            ]
-            
-            df_americas = df[df[region_col].apply(
-                lambda x: any(kw in str(x).lower() for kw in americas_keywords) 
-                if pd.notna(x) else False
-            )]
+            emit(f"\nRegions in data ({len(region_counts)}):")
+            for region, count in region_counts.sort_index().head(10).items():
+                emit(f"  - {region}: {int(count):,} records")
+            if len(region_counts) > 10:
+                emit(f"  ... and {len(region_counts) - 10} more")
         else:
-            print("⚠️  No region column found, filtering by coordinates...")
-            # Filter by coordinates for Americas
-            df_americas = df[
-                (df['latitude'].between(-60, 80)) & 
-                (df['longitude'].between(-170, -30))
-            ]
-        
-        print(f"\n📊 Filtering Results:")
-        print(f"  Original records: {len(df):,}")
-        print(f"  Americas records: {len(df_americas):,}")
-        print(f"  Removed: {len(df) - len(df_americas):,}")
-        print(f"  Kept: {(len(df_americas)/len(df)*100):.1f}%")
+            emit("⚠️  No region column found, filtered by coordinates")
+        
+        emit(f"\n📊 Filtering Results:")
+        emit(f"  Original records: {total_records:,}")
+        emit(f"  Americas records: {len(df_americas):,}")
+        emit(f"  Removed: {total_records - len(df_americas):,}")
+        emit(f"  Kept: {(len(df_americas)/total_records*100):.1f}%")
         
         # Statistics
-        print(f"\n📈 Americas Data Statistics:")
+        emit(f"\n📈 Americas Data Statistics:")
         if 'number_dead' in df_americas.columns:
-            print(f"  Total dead: {int(df_americas['number_dead'].sum()):,}")
+            emit(f"  Total dead: {int(df_americas['number_dead'].sum()):,}")
         if 'number_missing' in df_americas.columns:
-            print(f"  Total missing: {int(df_americas['number_missing'].sum()):,}")
+            emit(f"  Total missing: {int(df_americas['number_missing'].sum()):,}")
         if 'number_survivors' in df_americas.columns:
-            print(f"  Total survivors: {int(df_americas['number_survivors'].sum()):,}")
+            emit(f"  Total survivors: {int(df_americas['number_survivors'].sum()):,}")
+        
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
         
         # Step 4: Save processed data
         print(f"\nStep 4: Saving processed data...\n")
         
-        # Create directories
-        os.makedirs('data/processed', exist_ok=True)
-        
-        # Save full processed data
-        full_output = 'data/processed/iom_processed.csv'
-        df.to_csv(full_output, index=False)
+        # Full processed data was written chunk by chunk in step 2
         print(f"✓ Full data saved: {full_output}")
+        print(f"✓ Full data saved: {full_parquet}")
         
-        # Save Americas-only data
-        americas_output = 'data/processed/iom_americas_filtered.csv'
-        df_americas.to_csv(americas_output, index=False)
-        print(f"✓ Americas data saved: {americas_output}")
-        
-        # Save with timestamp
+        # Serialize the Americas data once, to the timestamped backup, then
+        # copy it to the filtered file. A copy (not a hardlink) keeps the
+        # backup separate from later in-place writes to the filtered file;
+        # the copy is swapped in with os.replace so readers never see a
+        # half-written file.
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         backup_output = f'data/processed/iom_americas_{timestamp}.csv'
         df_americas.to_csv(backup_output, index=False)
+        
+        americas_output = 'data/processed/iom_americas_filtered.csv'
+        tmp_output = americas_output + '.tmp'
+        shutil.copyfile(backup_output, tmp_output)
+        os.replace(tmp_output, americas_output)
+        print(f"✓ Americas data saved: {americas_output}")
         print(f"✓ Backup saved: {backup_output}")
         
-        print("\n" + "=" * 70)
-        print("✅ SUCCESS! IOM DATA IS READY!")
-        print("=" * 70)
+        # Summary goes out in one write
+        buf = io.StringIO()
+        emit = partial(print, file=buf)
+        
+        emit("\n" + "=" * 70)
+        emit("✅ SUCCESS! IOM DATA IS READY!")
+        emit("=" * 70)
+        
+        emit(f"\n📁 Files created:")
+        emit(f"  1. {full_output} ({total_records:,} records - all regions)")
+        emit(f"     {full_parquet} (same data, typed Parquet)")
+        emit(f"  2. {americas_output} ({len(df_americas):,} records - Americas only)")
+        emit(f"  3. {backup_output} (timestamped backup)")
         
-        print(f"\n📁 Files created:")
-        print(f"  1. {full_output} ({len(df):,} records - all regions)")
-        print(f"  2. {americas_output} ({len(df_americas):,} records - Americas only)")
-        print(f"  3. {backup_output} (timestamped backup)")
+        emit(f"\n🎯 Next Steps:")
+        emit(f"  1. Load data into database:")
+        emit(f"     python scripts/load_iom_data.py")
+        emit(f"\n  2. Or use Americas-only data:")
+        emit(f"     Modify load_iom_data.py to use: {americas_output}")
+        emit(f"\n  3. Start Flask and view your map!")
+        emit(f"     python src/app.py")
         
-        print(f"\n🎯 Next Steps:")
-        print(f"  1. Load data into database:")
-        print(f"     python scripts/load_iom_data.py")
-        print(f"\n  2. Or use Americas-only data:")
-        print(f"     Modify load_iom_data.py to use: {americas_output}")
-        print(f"\n  3. Start Flask and view your map!")
-        print(f"     python src/app.py")
+        emit("\n" + "=" * 70)
         
-        print("\n" + "=" * 70)
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
         
         return True
         
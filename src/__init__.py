@@ -1 +1 @@
-from .app import app 
\ No newline at end of file
+# src/__init__.py
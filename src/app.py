@@ -1,67 +1,125 @@
 from flask import Flask, render_template, jsonify
-from flask_cors import CORS
 import os
 from dotenv import load_dotenv
-from src.extensions import db
-from src.models.models import *
-from src.routes.api_routes import api_bp
+from src.extensions import OrjsonProvider, cache, cache_config, clear_api_cache, db
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Flask app
-app = Flask(__name__, 
-           template_folder='../templates',
-           static_folder='../static')
 
-# Configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
-    'DATABASE_URL')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-for-sprint-4')
+def create_app():
+    """
+    Build and configure the Flask app
 
-# Import and initialize extensions
-db.init_app(app)
-CORS(app)  # Enable CORS for API access
+    CORS, the API blueprint (and with it the models) are imported here rather
+    than at module level, so importing this module stays cheap.
+    """
+    from flask_cors import CORS
+    from src.routes.api_routes import api_bp
 
-# register API blueprint
-app.register_blueprint(api_bp)
+    # Initialize Flask app
+    app = Flask(__name__,
+               template_folder='../templates',
+               static_folder='../static')
 
-@app.route("/test-db")
-def test_db():
-    try:
-        count = db.session.query(WorldCupVenue).count()
-        return f"DB connected, {count} venues found"
-    except Exception as e:
-        return f"DB connection failed: {e}"
+    # Configuration
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
+        'DATABASE_URL')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-for-sprint-4')
+    
+    # RedisCache (shared by all workers) when REDIS_URL is set, otherwise an
+    # in-process SimpleCache
+    app.config.update(cache_config())
 
+    # jsonify() through orjson
+    app.json = OrjsonProvider(app)
+    
+    # Import and initialize extensions
+    db.init_app(app)
+    cache.init_app(app)
+    CORS(app)  # Enable CORS for API access
 
-@app.route("/")
-def home():
-    return render_template("map.html") 
+    # register API blueprint
+    app.register_blueprint(api_bp)
 
+    register_pages(app)
+    register_commands(app)
 
-@app.route('/map')
-def map_view():
-    """Interactive map page"""
-    return render_template('map.html')
+    return app
 
-@app.route('/dashboard')
-def dashboard():
-    """Dashboard page"""
-    return render_template('dashboard.html')
 
-@app.route('/analysis')
-def analysis():
-    """Analysis page"""
-    return render_template('analysis.html')
+def register_commands(app):
+    """Register `flask` CLI commands"""
 
-# Error handlers
-@app.errorhandler(404)
-def not_found(e):
-    return jsonify({'error': 'Not found'}), 404
+    @app.cli.command('clear-cache')
+    def clear_cache_command():
+        """Drop every cached API response (e.g. after loading new data)"""
+        if clear_api_cache():
+            print("✓ API cache cleared")
+        else:
+            print("⚠️  No shared cache (REDIS_URL not set); worker caches expire on their own")
 
-@app.errorhandler(500)
-def server_error(e):
-    return jsonify({'error': 'Internal server error'}), 500
 
+def register_pages(app):
+    """Register page routes and error handlers"""
+
+    @app.route("/test-db")
+    def test_db():
+        from sqlalchemy import func, select
+        from src.models.models import WorldCupVenue
+        try:
+            count = db.session.execute(
+                select(func.count()).select_from(WorldCupVenue)
+            ).scalar()
+            return f"DB connected, {count} venues found"
+        except Exception as e:
+            return f"DB connection failed: {e}"
+
+
+    @app.route("/")
+    def home():
+        return render_template("map.html")
+
+
+    @app.route('/map')
+    def map_view():
+        """Interactive map page"""
+        return render_template('map.html')
+
+    @app.route('/dashboard')
+    def dashboard():
+        """Dashboard page"""
+        return render_template('dashboard.html')
+
+    @app.route('/analysis')
+    def analysis():
+        """Analysis page"""
+        return render_template('analysis.html')
+
+    # Error handlers
+    @app.errorhandler(404)
+    def not_found(e):
+        return jsonify({'error': 'Not found'}), 404
+
+    @app.errorhandler(500)
+    def server_error(e):
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+_app = None
+
+
+def __getattr__(name):
+    # `src.app:app` (gunicorn) and `from src.app import app` build the app on
+    # first access instead of at import time
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if __name__ == "__main__":
+    create_app().run(debug=True)
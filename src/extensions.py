@@ -1,4 +1,109 @@
+import decimal
+import os
+from datetime import date
+
+import orjson
+from flask import Flask
+from flask.json.provider import JSONProvider
+from flask_caching import Cache
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import DeclarativeBase
+from werkzeug.http import http_date
+
+
+class Base(DeclarativeBase):
+    pass
+
 
 # Initialize SQLAlchemy
-db = SQLAlchemy()
\ No newline at end of file
+# Models subclass db.Model (built on Base), so the app and the scripts share
+# one metadata / registry.
+# The app only reads through db.session: no autoflush before each query and
+# no expiring loaded objects on commit (which would force re-SELECTs)
+db = SQLAlchemy(model_class=Base,
+                session_options={'autoflush': False, 'expire_on_commit': False})
+
+# Response cache for the read-mostly API endpoints (configured in create_app)
+cache = Cache()
+
+
+def cache_config():
+    """
+    Flask-Caching settings from the environment
+    
+    RedisCache (shared by all workers and the loader scripts) when REDIS_URL
+    is set, otherwise an in-process SimpleCache.
+    """
+    redis_url = os.getenv('REDIS_URL')
+    return {
+        'CACHE_TYPE': 'RedisCache' if redis_url else 'SimpleCache',
+        'CACHE_REDIS_URL': redis_url,
+        'CACHE_DEFAULT_TIMEOUT': 300,
+    }
+
+
+def clear_api_cache():
+    """
+    Drop every cached API response after new data is loaded
+    
+    Only the shared Redis cache can be reached from another process; a
+    SimpleCache lives inside each app worker and expires on its own timeout.
+    
+    Returns:
+        True if a shared cache was cleared, False otherwise
+    """
+    config = cache_config()
+    if config['CACHE_TYPE'] != 'RedisCache':
+        return False
+    
+    app = Flask(__name__)
+    app.config.update(config)
+    shared = Cache(app)
+    with app.app_context():
+        return bool(shared.clear())
+
+
+def cache_ok(rv):
+    """Only cache successful responses; error paths return (body, status)"""
+    return not isinstance(rv, tuple)
+
+
+def _orjson_default(o):
+    # Types orjson leaves to us, encoded the way Flask's default provider does
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    jsonify() / app.json backed by orjson
+    
+    Serializes the large row lists the API returns much faster than the
+    stdlib encoder, and numpy scalars / arrays as-is. Keys are not sorted.
+    Installed with ``app.json = OrjsonProvider(app)``.
+    """
+    
+    option = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+              | orjson.OPT_PASSTHROUGH_DATETIME)
+    
+    def _dumps_bytes(self, obj):
+        option = self.option
+        if self._app.debug:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_orjson_default, option=option)
+    
+    def dumps(self, obj, **kwargs):
+        return self._dumps_bytes(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumps_bytes(obj) + b"\n",
+                                        mimetype='application/json')
@@ -1,4 +1,11 @@
 # src/models/__init__.py
-from .models import Base, DataSource, WorldCupVenue, SmugglingIncident, SmugglingRoute, BorderCrossing, DataQualityLog
+__all__ = ['DataSource', 'WorldCupVenue', 'SmugglingIncident', 'SmugglingRoute', 'BorderCrossing', 'DataQualityLog']
 
-__all__ = ['Base', 'DataSource', 'WorldCupVenue', 'SmugglingIncident', 'SmugglingRoute', 'BorderCrossing', 'DataQualityLog']
\ No newline at end of file
+
+def __getattr__(name):
+    # Re-exports resolve on first access, importing the package alone
+    # does not load the mappers
+    if name in __all__:
+        from . import models
+        return getattr(models, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,258 +1,412 @@
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, Boolean, Date, DateTime, Float, JSON, ForeignKey, Index
-from sqlalchemy.orm import relationship
-from sqlalchemy.ext.declarative import declarative_base
+from datetime import date, datetime
+from typing import Any
+from math import asin, cos, isnan, radians, sin, sqrt
+import re
+import time
+import numpy as np
+from sqlalchemy import Column, Integer, MetaData, SmallInteger, Table, String, Text, Boolean, Date, DateTime, Float, ForeignKey, Index, Computed, event, func, insert, select, text
+from sqlalchemy.dialects.postgresql import ARRAY, ENUM, JSONB
+from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
+from geoalchemy2 import Geography
 
-# Import db from extensions for Flask-SQLAlchemy integration
+# Import db from extensions for Flask-SQLAlchemy integration; every model
+# subclasses db.Model, so the tables live in db.metadata
 from src.extensions import db
 
-# For models, we'll use declarative base
-# This will be connected to the db object through metadata
-Base = declarative_base()
+
+# PostGIS point built from the latitude/longitude columns
+GEOG_POINT_SQL = "ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography"
+
+
+def geog_column():
+    """
+    Generated geography(Point, 4326) column kept in sync with latitude/longitude
+    
+    latitude/longitude stay the writable columns; PostgreSQL maintains the
+    point, which spatial queries use through a GiST index. Deferred so plain
+    ORM loads don't fetch the WKB.
+    """
+    return mapped_column(
+        Geography(geometry_type='POINT', srid=4326, spatial_index=False),
+        Computed(GEOG_POINT_SQL, persisted=True),
+        deferred=True
+    )
+
+
+# Shared 4-byte enum for the Low..Very High rating columns
+risk_level_enum = ENUM('Low', 'Medium', 'High', 'Very High', name='risk_level')
+
 
 # Export db so other modules can import from models.models
-__all__ = ['db', 'Base', 'DataSource', 'WorldCupVenue', 'SmugglingIncident', 
+__all__ = ['db', 'DataSource', 'WorldCupVenue', 'SmugglingIncident', 
            'SmugglingRoute', 'BorderCrossing', 'DataQualityLog', 'CBPDrugSeizure']
 
-class DataSource(Base):
+class DataSource(db.Model):
     """Track data sources and their update schedules"""
     __tablename__ = 'data_sources'
     
-    id = Column(Integer, primary_key=True)
-    name = Column(String(100), unique=True, nullable=False)
-    url = Column(String(500))
-    description = Column(Text)
-    data_type = Column(String(50))  # 'incidents', 'statistics', 'routes'
-    update_frequency = Column(String(50))  # 'daily', 'weekly', 'monthly'
-    last_updated = Column(DateTime)
-    is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
+    url: Mapped[str | None] = mapped_column(String(500))
+    description: Mapped[str | None] = mapped_column(Text)
+    data_type: Mapped[str | None] = mapped_column(String(50))  # 'incidents', 'statistics', 'routes'
+    update_frequency: Mapped[str | None] = mapped_column(String(50))  # 'daily', 'weekly', 'monthly'
+    last_updated: Mapped[datetime | None] = mapped_column(DateTime)
+    is_active: Mapped[bool | None] = mapped_column(Boolean, default=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    incidents = relationship('SmugglingIncident', back_populates='source')
+    # Read-only and never lazy-loaded: a source's incidents must be fetched
+    # with an explicit selectinload() or query, never row by row
+    incidents: Mapped[list['SmugglingIncident']] = relationship(back_populates='source',
+                                                                viewonly=True, lazy='raise')
+    
+    __table_args__ = (
+        # Partial index: only active sources, which is what gets listed
+        Index('idx_active_sources', 'data_type', postgresql_where=text('is_active IS TRUE')),
+    )
     
     def __repr__(self):
         return f'<DataSource {self.name}>'
 
 
-class WorldCupVenue(Base):
+class WorldCupVenue(db.Model):
     """World Cup 2026 venue locations"""
     __tablename__ = 'worldcup_venues'
     
-    id = Column(Integer, primary_key=True)
-    venue_name = Column(String(100), nullable=False)
-    city = Column(String(100), nullable=False)
-    state_province = Column(String(100))
-    country = Column(String(50), nullable=False)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    venue_name: Mapped[str] = mapped_column(String(100), nullable=False)
+    city: Mapped[str] = mapped_column(String(100), nullable=False)
+    state_province: Mapped[str | None] = mapped_column(String(100))
+    country: Mapped[str] = mapped_column(String(50), nullable=False)
     
-    # For now, store as separate lat/lon columns
-    # We'll add PostGIS Geography type later when PostgreSQL is set up
-    latitude = Column(Float)
-    longitude = Column(Float)
+    # Location (geog is generated from latitude/longitude)
+    latitude: Mapped[float | None] = mapped_column(Float)
+    longitude: Mapped[float | None] = mapped_column(Float)
+    geog: Mapped[Any] = geog_column()
     
     # Venue details
-    capacity = Column(Integer)
-    metro_population = Column(Integer)
-    border_proximity_km = Column(Integer)
-    host_matches = Column(Integer)
-    security_risk_level = Column(String(20))  # 'Low', 'Medium', 'High'
-    region = Column(String(50))
+    capacity: Mapped[int | None] = mapped_column(Integer)
+    metro_population: Mapped[int | None] = mapped_column(Integer)
+    border_proximity_km: Mapped[int | None] = mapped_column(Integer)
+    host_matches: Mapped[int | None] = mapped_column(SmallInteger)
+    security_risk_level: Mapped[str | None] = mapped_column(risk_level_enum)
+    region: Mapped[str | None] = mapped_column(String(50))
     
     # Metadata
-    formatted_address = Column(String(500))
-    google_place_id = Column(String(100))
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    formatted_address: Mapped[str | None] = mapped_column(String(500))
+    google_place_id: Mapped[str | None] = mapped_column(String(100))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index('idx_venues_geog', 'geog', postgresql_using='gist'),
+    )
     
     def __repr__(self):
         return f'<Venue {self.venue_name}, {self.city}>'
 
 
-class SmugglingIncident(Base):
+class SmugglingIncident(db.Model):
     """Individual smuggling incidents and migration events"""
     __tablename__ = 'smuggling_incidents'
     
-    id = Column(Integer, primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
     
     # Basic information
-    incident_type = Column(String(50))  # 'border_crossing', 'interdiction', 'death', etc.
-    incident_date = Column(Date, nullable=False)
-    incident_year = Column(Integer, index=True)
-    incident_month = Column(Integer)
-    
-    # Location data (using lat/lon for now)
-    latitude = Column(Float)
-    longitude = Column(Float)
-    location_description = Column(String(500))
-    city = Column(String(100))
-    state_province = Column(String(100))
-    country = Column(String(50), index=True)
-    region = Column(String(100))
+    incident_type: Mapped[str | None] = mapped_column(String(50))  # 'border_crossing', 'interdiction', 'death', etc.
+    incident_date: Mapped[date] = mapped_column(Date, nullable=False)
+    incident_year: Mapped[int | None] = mapped_column(Integer, index=True)
+    incident_month: Mapped[int | None] = mapped_column(SmallInteger)
+    
+    # Location data (geog is generated from latitude/longitude)
+    latitude: Mapped[float | None] = mapped_column(Float)
+    longitude: Mapped[float | None] = mapped_column(Float)
+    geog: Mapped[Any] = geog_column()
+    
+    # Nearest World Cup venue, filled in on insert (see set_nearest_venue)
+    nearest_venue_id: Mapped[int | None] = mapped_column(Integer, ForeignKey('worldcup_venues.id'), index=True)
+    nearest_venue_km: Mapped[float | None] = mapped_column(Float)
+    
+    location_description: Mapped[str | None] = mapped_column(String(500))
+    city: Mapped[str | None] = mapped_column(String(100))
+    state_province: Mapped[str | None] = mapped_column(String(100))
+    country: Mapped[str | None] = mapped_column(String(50), index=True)
+    region: Mapped[str | None] = mapped_column(String(100))
     
     # Incident details
-    number_of_people = Column(Integer)
-    number_dead = Column(Integer)
-    number_missing = Column(Integer)
-    number_survivors = Column(Integer)
+    number_of_people: Mapped[int | None] = mapped_column(Integer)
+    number_dead: Mapped[int | None] = mapped_column(SmallInteger)
+    number_missing: Mapped[int | None] = mapped_column(SmallInteger)
+    number_survivors: Mapped[int | None] = mapped_column(SmallInteger)
     
     # Smuggling specifics
-    smuggling_method = Column(String(100))  # 'vehicle', 'boat', 'foot', etc.
-    route_description = Column(Text)
-    cause_of_death = Column(String(200))
+    smuggling_method: Mapped[str | None] = mapped_column(String(100))  # 'vehicle', 'boat', 'foot', etc.
+    route_description: Mapped[str | None] = mapped_column(Text)
+    cause_of_death: Mapped[str | None] = mapped_column(String(200))
     
     # Demographics (when available)
-    migrant_origin_countries = Column(Text)  # Comma-separated list
-    age_groups = Column(String(200))
-    gender_distribution = Column(String(100))
+    migrant_origin_countries: Mapped[list[str] | None] = mapped_column(ARRAY(Text))  # Queried with ANY / @>
+    age_groups: Mapped[str | None] = mapped_column(String(200))
+    gender_distribution: Mapped[str | None] = mapped_column(String(100))
     
     # Source information
-    source_id = Column(Integer, ForeignKey('data_sources.id'))
-    source_url = Column(String(500))
-    source_quality = Column(String(20))  # 'verified', 'unverified', 'estimated'
+    source_id: Mapped[int | None] = mapped_column(Integer, ForeignKey('data_sources.id'))
+    source_url: Mapped[str | None] = mapped_column(String(500))
+    source_quality: Mapped[str | None] = mapped_column(String(20))  # 'verified', 'unverified', 'estimated'
     
     # Metadata
-    raw_data = Column(JSON)  # Store original data for reference
-    notes = Column(Text)
-    is_verified = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    raw_data: Mapped[dict | None] = mapped_column(JSONB)  # Store original data for reference
+    notes: Mapped[str | None] = mapped_column(Text)
+    is_verified: Mapped[bool | None] = mapped_column(Boolean, default=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
-    source = relationship('DataSource', back_populates='incidents')
+    # Many-to-one: load the sources of a whole result set with one IN query
+    source: Mapped['DataSource | None'] = relationship(back_populates='incidents', lazy='selectin')
+    
+    __table_args__ = (
+        Index('idx_incidents_geog', 'geog', postgresql_using='gist'),
+        # Country + year filters sorted by date, with the casualty counts
+        # included so dashboard aggregates can stay index-only
+        Index('idx_incident_country_year_date', 'country', 'incident_year', 'incident_date',
+              postgresql_include=['number_of_people', 'number_dead', 'number_missing']),
+        # Containment (@>) lookups on the original source record
+        Index('idx_incidents_raw_data_gin', 'raw_data', postgresql_using='gin'),
+        Index('idx_incident_origins_gin', 'migrant_origin_countries', postgresql_using='gin'),
+        # Verified incidents are a small subset; index only those
+        Index('idx_verified_incidents_year', 'incident_year',
+              postgresql_where=text('is_verified IS TRUE')),
+        # Rows arrive roughly in date order, so block-range indexes prune
+        # date-range scans at a fraction of a B-tree's size
+        Index('idx_incident_date_brin', 'incident_date',
+              postgresql_using='brin', postgresql_with={'pages_per_range': 32}),
+        Index('idx_incident_created_brin', 'created_at',
+              postgresql_using='brin', postgresql_with={'pages_per_range': 32}),
+    )
     
     def __repr__(self):
         return f'<Incident {self.id}: {self.incident_type} on {self.incident_date}>'
 
 
-class SmugglingRoute(Base):
+class SmugglingRoute(db.Model):
     """Known smuggling corridors and routes"""
     __tablename__ = 'smuggling_routes'
     
-    id = Column(Integer, primary_key=True)
-    route_name = Column(String(200), nullable=False)
-    route_description = Column(Text)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    route_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    route_description: Mapped[str | None] = mapped_column(Text)
     
-    # Store route as JSON array of coordinates for now
+    # Store route as JSONB array of coordinates
     # Format: [{"lat": x, "lon": y}, {"lat": x2, "lon": y2}, ...]
-    route_coordinates = Column(JSON)
+    # Kept for existing callers; spatial queries use route_geom, which is
+    # built from it on insert/update (see set_route_geom)
+    route_coordinates: Mapped[list | None] = mapped_column(JSONB)
+    route_geom: Mapped[Any] = mapped_column(Geography(geometry_type='LINESTRING', srid=4326, spatial_index=False),
+                                            deferred=True)
     
     # Route details
-    origin_country = Column(String(50))
-    destination_country = Column(String(50))
-    transit_countries = Column(Text)  # Comma-separated
+    origin_country: Mapped[str | None] = mapped_column(String(50))
+    destination_country: Mapped[str | None] = mapped_column(String(50))
+    transit_countries: Mapped[list[str] | None] = mapped_column(ARRAY(Text))
     
     # Activity metrics
-    activity_level = Column(String(20))  # 'Low', 'Medium', 'High', 'Very High'
-    estimated_annual_crossings = Column(Integer)
-    primary_transport_method = Column(String(100))
+    activity_level: Mapped[str | None] = mapped_column(risk_level_enum)
+    estimated_annual_crossings: Mapped[int | None] = mapped_column(Integer)
+    primary_transport_method: Mapped[str | None] = mapped_column(String(100))
     
     # Risk assessment
-    danger_level = Column(String(20))
-    known_criminal_organizations = Column(Text)
+    danger_level: Mapped[str | None] = mapped_column(risk_level_enum)
+    known_criminal_organizations: Mapped[list[str] | None] = mapped_column(ARRAY(Text))
     
     # Source and metadata
-    source_id = Column(Integer, ForeignKey('data_sources.id'))
-    last_reported_activity = Column(Date)
-    is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    source_id: Mapped[int | None] = mapped_column(Integer, ForeignKey('data_sources.id'))
+    last_reported_activity: Mapped[date | None] = mapped_column(Date)
+    is_active: Mapped[bool | None] = mapped_column(Boolean, default=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        # Only containment (@>) is queried, so the smaller jsonb_path_ops GIN
+        Index('idx_routes_coordinates_path_gin', 'route_coordinates', postgresql_using='gin',
+              postgresql_ops={'route_coordinates': 'jsonb_path_ops'}),
+        Index('idx_route_geom', 'route_geom', postgresql_using='gist'),
+        Index('idx_active_routes', 'origin_country', 'destination_country',
+              postgresql_where=text('is_active IS TRUE')),
+        Index('idx_route_transit_gin', 'transit_countries', postgresql_using='gin'),
+        Index('idx_route_orgs_gin', 'known_criminal_organizations', postgresql_using='gin'),
+    )
     
     def __repr__(self):
         return f'<Route {self.route_name}>'
 
 
-class BorderCrossing(Base):
+# WKT of the route line, computed by PostGIS; deferred, so load it with
+# undefer(SmugglingRoute.route_wkt) where it is needed
+SmugglingRoute.route_wkt = column_property(func.ST_AsText(SmugglingRoute.route_geom), deferred=True)
+
+
+class BorderCrossing(db.Model):
     """Official and unofficial border crossing points"""
     __tablename__ = 'border_crossings'
     
-    id = Column(Integer, primary_key=True)
-    crossing_name = Column(String(200), nullable=False)
-    crossing_type = Column(String(50))  # 'official', 'unofficial', 'common_route'
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    crossing_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    crossing_type: Mapped[str | None] = mapped_column(String(50))  # 'official', 'unofficial', 'common_route'
     
     # Location
-    latitude = Column(Float)
-    longitude = Column(Float)
-    border_between = Column(String(100))  # e.g., "USA-Mexico"
-    state_province = Column(String(100))
+    latitude: Mapped[float | None] = mapped_column(Float)
+    longitude: Mapped[float | None] = mapped_column(Float)
+    geog: Mapped[Any] = geog_column()
+    border_between: Mapped[str | None] = mapped_column(String(100))  # e.g., "USA-Mexico"
+    state_province: Mapped[str | None] = mapped_column(String(100))
     
     # Details
-    crossing_status = Column(String(50))  # 'open', 'closed', 'restricted'
-    daily_capacity = Column(Integer)
-    surveillance_level = Column(String(20))  # 'Low', 'Medium', 'High'
+    crossing_status: Mapped[str | None] = mapped_column(String(50))  # 'open', 'closed', 'restricted'
+    daily_capacity: Mapped[int | None] = mapped_column(Integer)
+    surveillance_level: Mapped[str | None] = mapped_column(risk_level_enum)
     
     # Statistics (when available)
-    average_daily_crossings = Column(Integer)
-    apprehensions_last_month = Column(Integer)
+    average_daily_crossings: Mapped[int | None] = mapped_column(Integer)
+    apprehensions_last_month: Mapped[int | None] = mapped_column(Integer)
     
     # Metadata
-    notes = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    notes: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index('idx_borders_geog', 'geog', postgresql_using='gist'),
+    )
     
     def __repr__(self):
         return f'<BorderCrossing {self.crossing_name}>'
 
 
-class DataQualityLog(Base):
+# Nearest border crossing per venue (KNN on the geog GiST indexes). It is a
+# materialized view, created by scripts/setup_database_postgresql.py and
+# refreshed nightly by scripts/scheduler.py
+VENUE_NEAREST_CROSSING_SQL = """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS venue_nearest_crossing AS
+    SELECT v.id AS venue_id, c.id AS crossing_id,
+           ST_Distance(v.geog, c.geog, false) / 1000 AS km
+    FROM worldcup_venues v
+    CROSS JOIN LATERAL (
+        SELECT b.id, b.geog
+        FROM border_crossings b
+        WHERE b.geog IS NOT NULL
+        ORDER BY v.geog <-> b.geog
+        LIMIT 1
+    ) c
+    WHERE v.geog IS NOT NULL;
+    
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_venue_nearest_crossing_venue
+    ON venue_nearest_crossing (venue_id);
+"""
+
+# Refresh the view and copy the distances onto worldcup_venues
+REFRESH_VENUE_NEAREST_CROSSING_SQL = """
+    REFRESH MATERIALIZED VIEW CONCURRENTLY venue_nearest_crossing;
+    
+    UPDATE worldcup_venues v
+    SET border_proximity_km = round(n.km)
+    FROM venue_nearest_crossing n
+    WHERE n.venue_id = v.id
+      AND v.border_proximity_km IS DISTINCT FROM round(n.km);
+"""
+
+
+class VenueNearestCrossing(db.Model):
+    """Read-only mapping of the venue_nearest_crossing materialized view"""
+    # Own MetaData, so create_all never tries to create the view as a table
+    __table__ = Table(
+        'venue_nearest_crossing', MetaData(),
+        Column('venue_id', Integer, primary_key=True),
+        Column('crossing_id', Integer),
+        Column('km', Float),
+    )
+    
+    def __repr__(self):
+        return f'<VenueNearestCrossing {self.venue_id} -> {self.crossing_id}>'
+
+
+class DataQualityLog(db.Model):
     """Track data quality and validation issues"""
     __tablename__ = 'data_quality_logs'
     
-    id = Column(Integer, primary_key=True)
-    source_id = Column(Integer, ForeignKey('data_sources.id'))
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    source_id: Mapped[int | None] = mapped_column(Integer, ForeignKey('data_sources.id'))
     
     # Quality metrics
-    total_records_processed = Column(Integer)
-    valid_records = Column(Integer)
-    invalid_records = Column(Integer)
-    duplicate_records = Column(Integer)
+    total_records_processed: Mapped[int | None] = mapped_column(Integer)
+    valid_records: Mapped[int | None] = mapped_column(Integer)
+    invalid_records: Mapped[int | None] = mapped_column(Integer)
+    duplicate_records: Mapped[int | None] = mapped_column(Integer)
     
     # Issues found
-    validation_errors = Column(JSON)  # Store error details
+    validation_errors: Mapped[dict | None] = mapped_column(JSONB)  # Store error details
     
     # Processing info
-    processing_date = Column(DateTime, default=datetime.utcnow)
-    processing_duration_seconds = Column(Float)
+    processing_date: Mapped[datetime | None] = mapped_column(DateTime, default=datetime.utcnow)
+    processing_duration_seconds: Mapped[float | None] = mapped_column(Float)
     
     def __repr__(self):
         return f'<QualityLog {self.processing_date}>'
 
-class CBPDrugSeizure(Base):
+class CBPDrugSeizure(db.Model):
     """CBP Drug Seizures Data"""
     __tablename__ = 'cbp_drug_seizures'
     
-    id = Column(Integer, primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
     
     # Time information
-    fiscal_year = Column(Integer, nullable=False, index=True)
-    month = Column(String(20), nullable=False)
-    month_number = Column(Integer)  # 1-12 for easy sorting
+    fiscal_year: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    month: Mapped[str] = mapped_column(String(20), nullable=False)
+    month_number: Mapped[int | None] = mapped_column(SmallInteger)  # 1-12 for easy sorting
     
     # Organization
-    component = Column(String(100))  # Office of Field Operations, Border Patrol, etc.
-    region = Column(String(100))
-    land_filter = Column(String(50))
-    area_of_responsibility = Column(String(100), index=True)  # Field Office name
+    component: Mapped[str | None] = mapped_column(String(100))  # Office of Field Operations, Border Patrol, etc.
+    region: Mapped[str | None] = mapped_column(String(100))
+    land_filter: Mapped[str | None] = mapped_column(String(50))
+    area_of_responsibility: Mapped[str | None] = mapped_column(String(100), index=True)  # Field Office name
     
     # Drug information
-    drug_type = Column(String(100), nullable=False, index=True)
-    event_count = Column(Integer, default=0)
-    quantity_lbs = Column(Float, default=0.0)
+    drug_type: Mapped[str] = mapped_column(String(100), nullable=False)  # indexed by idx_cbp_drug_type
+    event_count: Mapped[int | None] = mapped_column(Integer, default=0)
+    quantity_lbs: Mapped[float | None] = mapped_column(Float, default=0.0)
     
     # Geocoding (we'll add coordinates based on field office)
-    latitude = Column(Float)
-    longitude = Column(Float)
-    city = Column(String(100))
-    state = Column(String(50))
+    latitude: Mapped[float | None] = mapped_column(Float)
+    longitude: Mapped[float | None] = mapped_column(Float)
+    geog: Mapped[Any] = geog_column()
+    city: Mapped[str | None] = mapped_column(String(100))
+    state: Mapped[str | None] = mapped_column(String(50))
+    
+    # Nearest World Cup venue, filled in on insert (see set_nearest_venue)
+    nearest_venue_id: Mapped[int | None] = mapped_column(Integer, ForeignKey('worldcup_venues.id'), index=True)
+    nearest_venue_km: Mapped[float | None] = mapped_column(Float)
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     
     # Unique constraint to prevent duplicates
     __table_args__ = (
         Index('idx_cbp_unique', 'fiscal_year', 'month', 'component', 'area_of_responsibility', 'drug_type', unique=True),
-        Index('idx_cbp_location', 'latitude', 'longitude'),
         Index('idx_cbp_drug_type', 'drug_type'),
-        Index('idx_cbp_year_month', 'fiscal_year', 'month_number'),
+        # INCLUDE lets the per-year drug rollups run as index-only scans
+        Index('idx_cbp_year_month', 'fiscal_year', 'month_number',
+              postgresql_include=['drug_type', 'quantity_lbs', 'event_count']),
+        Index('idx_cbp_has_coords', text('event_count DESC'),
+              postgresql_where=text('latitude IS NOT NULL AND longitude IS NOT NULL')),
+        # /api/cbp-seizures: located rows of one year (and drug), by event count
+        Index('idx_cbp_coords_year_drug', 'fiscal_year', 'drug_type', text('event_count DESC'),
+              postgresql_where=text('latitude IS NOT NULL AND longitude IS NOT NULL')),
+        Index('idx_cbp_geog', 'geog', postgresql_using='gist'),
+        Index('idx_cbp_year_month_brin', 'fiscal_year', 'month_number',
+              postgresql_using='brin', postgresql_with={'pages_per_range': 32}),
+        Index('idx_cbp_created_brin', 'created_at',
+              postgresql_using='brin', postgresql_with={'pages_per_range': 32}),
     )
     
     def __repr__(self):
@@ -286,6 +440,41 @@ CBP_FIELD_OFFICE_LOCATIONS = {
     'WASHINGTON FIELD OFFICE': {'city': 'Washington', 'state': 'DC', 'lat': 38.9072, 'lon': -77.0369},
 }
 
+# The same mapping as parallel arrays plus a name -> position index, so a
+# whole column of office names is geocoded with one gather per field
+_FIELD_OFFICE_NAMES = np.array(list(CBP_FIELD_OFFICE_LOCATIONS))
+_FIELD_OFFICE_LATS = np.array([loc['lat'] for loc in CBP_FIELD_OFFICE_LOCATIONS.values()], dtype=np.float64)
+_FIELD_OFFICE_LONS = np.array([loc['lon'] for loc in CBP_FIELD_OFFICE_LOCATIONS.values()], dtype=np.float64)
+_FIELD_OFFICE_CITIES = np.array([loc['city'] for loc in CBP_FIELD_OFFICE_LOCATIONS.values()], dtype=object)
+_FIELD_OFFICE_STATES = np.array([loc['state'] for loc in CBP_FIELD_OFFICE_LOCATIONS.values()], dtype=object)
+_FIELD_OFFICE_IDX = {name: i for i, name in enumerate(_FIELD_OFFICE_NAMES)}
+
+
+def lookup_field_offices(names):
+    """
+    Geocode a sequence of CBP field office names
+    
+    Args:
+        names: Office names (matched case-insensitively)
+        
+    Returns:
+        (lats, lons, cities, states) arrays aligned with names; unknown
+        offices get NaN coordinates and None city/state
+    """
+    idx = np.fromiter(
+        (_FIELD_OFFICE_IDX.get(str(name).upper(), -1) for name in names),
+        dtype=np.int32, count=len(names)
+    )
+    found = idx >= 0
+    idx = np.where(found, idx, 0)
+    
+    return (
+        np.where(found, _FIELD_OFFICE_LATS[idx], np.nan),
+        np.where(found, _FIELD_OFFICE_LONS[idx], np.nan),
+        np.where(found, _FIELD_OFFICE_CITIES[idx], None),
+        np.where(found, _FIELD_OFFICE_STATES[idx], None),
+    )
+
 """
 NIBRS Crime Data Model - Add to models.py
 
@@ -295,98 +484,150 @@ for crime analysis around World Cup 2026 venues.
 ADD THIS CLASS TO: src/models/models.py (at the end, before helper functions)
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Index
-from datetime import datetime
+# Composite 0-100 risk score, weighted toward violent crime, trafficking and
+# drugs; computed by PostgreSQL as a stored generated column
+NIBRS_RISK_SCORE_SQL = """
+    CASE WHEN total_offenses > 0 THEN
+        LEAST(
+            (COALESCE(murder_nonnegligent_manslaughter, 0) * 10.0
+             + COALESCE(aggravated_assault, 0) * 5.0
+             + COALESCE(rape, 0) * 5.0
+             + COALESCE(robbery, 0) * 3.0
+             + COALESCE(kidnapping_abduction, 0) * 8.0
+             + COALESCE(human_trafficking_offenses, 0) * 10.0
+             + COALESCE(drug_narcotic_offenses, 0) * 2.0
+             + COALESCE(burglary, 0) * 0.5
+            ) / (total_offenses * 10.0) * 100,
+            100
+        )
+    ELSE 0 END
+"""
+
+# Tables created before the score was generated have a plain (loader-filled)
+# overall_risk_score, which can't be altered in place: drop and re-add it as
+# the generated column. Indexes on the old column go with it; recreate them
+# after running this.
+NIBRS_RISK_SCORE_MIGRATION_SQL = f"""
+    DO $$
+    BEGIN
+        IF EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_schema = current_schema()
+                     AND table_name = 'nibrs_crime_data'
+                     AND column_name = 'overall_risk_score'
+                     AND is_generated = 'NEVER') THEN
+            ALTER TABLE nibrs_crime_data DROP COLUMN overall_risk_score;
+        END IF;
+    END $$;
+    
+    ALTER TABLE nibrs_crime_data
+    ADD COLUMN IF NOT EXISTS overall_risk_score double precision
+    GENERATED ALWAYS AS ({NIBRS_RISK_SCORE_SQL}) STORED;
+"""
+
 
-class NIBRSCrimeData(Base):
+class NIBRSCrimeData(db.Model):
     """FBI NIBRS Crime Statistics by Agency and Year"""
     __tablename__ = 'nibrs_crime_data'
     
-    id = Column(Integer, primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
     
     # Location and Agency Information
-    year = Column(Integer, nullable=False, index=True)
-    state = Column(String(50), nullable=False, index=True)
-    agency_type = Column(String(100))
-    agency_name = Column(String(200), nullable=False, index=True)
+    year: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    state: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+    agency_type: Mapped[str | None] = mapped_column(String(100))
+    agency_name: Mapped[str] = mapped_column(String(200), nullable=False, index=True)
     
-    # Geocoding (we'll add this based on city/state)
-    city = Column(String(100), index=True)
-    latitude = Column(Float)
-    longitude = Column(Float)
+    # Geocoding (we'll add this based on city/state); geog is generated
+    city: Mapped[str | None] = mapped_column(String(100), index=True)
+    latitude: Mapped[float | None] = mapped_column(Float)
+    longitude: Mapped[float | None] = mapped_column(Float)
+    geog: Mapped[Any] = geog_column()
     
     # Total Offenses
-    total_offenses = Column(Integer, default=0)
+    total_offenses: Mapped[int | None] = mapped_column(Integer, default=0)
     
     # High-Level Categories
-    crimes_against_persons = Column(Integer, default=0)
-    crimes_against_property = Column(Integer, default=0)
-    crimes_against_society = Column(Integer, default=0)
+    crimes_against_persons: Mapped[int | None] = mapped_column(Integer, default=0)
+    crimes_against_property: Mapped[int | None] = mapped_column(Integer, default=0)
+    crimes_against_society: Mapped[int | None] = mapped_column(Integer, default=0)
     
     # Violent Crimes (Critical for World Cup Security)
-    assault_offenses = Column(Integer, default=0)
-    aggravated_assault = Column(Integer, default=0)
-    simple_assault = Column(Integer, default=0)
-    intimidation = Column(Integer, default=0)
+    assault_offenses: Mapped[int | None] = mapped_column(Integer, default=0)
+    aggravated_assault: Mapped[int | None] = mapped_column(Integer, default=0)
+    simple_assault: Mapped[int | None] = mapped_column(Integer, default=0)
+    intimidation: Mapped[int | None] = mapped_column(Integer, default=0)
     
     # Homicide
-    homicide_offenses = Column(Integer, default=0)
-    murder_nonnegligent_manslaughter = Column(Integer, default=0)
-    negligent_manslaughter = Column(Integer, default=0)
-    justifiable_homicide = Column(Integer, default=0)
+    homicide_offenses: Mapped[int | None] = mapped_column(Integer, default=0)
+    murder_nonnegligent_manslaughter: Mapped[int | None] = mapped_column(Integer, default=0)
+    negligent_manslaughter: Mapped[int | None] = mapped_column(Integer, default=0)
+    justifiable_homicide: Mapped[int | None] = mapped_column(Integer, default=0)
     
     # Human Trafficking (Relevant to smuggling analysis)
-    human_trafficking_offenses = Column(Integer, default=0)
-    commercial_sex_acts = Column(Integer, default=0)
-    involuntary_servitude = Column(Integer, default=0)
+    human_trafficking_offenses: Mapped[int | None] = mapped_column(Integer, default=0)
+    commercial_sex_acts: Mapped[int | None] = mapped_column(Integer, default=0)
+    involuntary_servitude: Mapped[int | None] = mapped_column(Integer, default=0)
     
     # Kidnapping
-    kidnapping_abduction = Column(Integer, default=0)
+    kidnapping_abduction: Mapped[int | None] = mapped_column(Integer, default=0)
     
     # Sex Offenses
-    sex_offenses = Column(Integer, default=0)
-    rape = Column(Integer, default=0)
-    sodomy = Column(Integer, default=0)
-    sexual_assault_with_object = Column(Integer, default=0)
+    sex_offenses: Mapped[int | None] = mapped_column(Integer, default=0)
+    rape: Mapped[int | None] = mapped_column(Integer, default=0)
+    sodomy: Mapped[int | None] = mapped_column(Integer, default=0)
+    sexual_assault_with_object: Mapped[int | None] = mapped_column(Integer, default=0)
     
     # Property Crimes
-    arson = Column(Integer, default=0)
-    burglary = Column(Integer, default=0)
-    larceny_theft = Column(Integer, default=0)
-    motor_vehicle_theft = Column(Integer, default=0)
-    robbery = Column(Integer, default=0)
-    vandalism = Column(Integer, default=0)
+    arson: Mapped[int | None] = mapped_column(Integer, default=0)
+    burglary: Mapped[int | None] = mapped_column(Integer, default=0)
+    larceny_theft: Mapped[int | None] = mapped_column(Integer, default=0)
+    motor_vehicle_theft: Mapped[int | None] = mapped_column(Integer, default=0)
+    robbery: Mapped[int | None] = mapped_column(Integer, default=0)
+    vandalism: Mapped[int | None] = mapped_column(Integer, default=0)
     
     # Drug Crimes (Critical for venue security)
-    drug_narcotic_offenses = Column(Integer, default=0)
-    drug_violations = Column(Integer, default=0)
-    drug_equipment_violations = Column(Integer, default=0)
+    drug_narcotic_offenses: Mapped[int | None] = mapped_column(Integer, default=0)
+    drug_violations: Mapped[int | None] = mapped_column(Integer, default=0)
+    drug_equipment_violations: Mapped[int | None] = mapped_column(Integer, default=0)
     
     # Organized Crime Indicators
-    gambling_offenses = Column(Integer, default=0)
-    prostitution_offenses = Column(Integer, default=0)
+    gambling_offenses: Mapped[int | None] = mapped_column(Integer, default=0)
+    prostitution_offenses: Mapped[int | None] = mapped_column(Integer, default=0)
     
     # Other Crimes
-    weapons_violations = Column(Integer, default=0)
-    fraud_offenses = Column(Integer, default=0)
-    identity_theft = Column(Integer, default=0)
+    weapons_violations: Mapped[int | None] = mapped_column(Integer, default=0)
+    fraud_offenses: Mapped[int | None] = mapped_column(Integer, default=0)
+    identity_theft: Mapped[int | None] = mapped_column(Integer, default=0)
     
     # Risk Scoring (calculated fields)
-    violent_crime_rate = Column(Float)  # Per 100k if we have population data
-    property_crime_rate = Column(Float)
-    overall_risk_score = Column(Float)  # Composite score for venue proximity
+    violent_crime_rate: Mapped[float | None] = mapped_column(Float)  # Per 100k if we have population data
+    property_crime_rate: Mapped[float | None] = mapped_column(Float)
+    overall_risk_score: Mapped[float | None] = mapped_column(Float, Computed(NIBRS_RISK_SCORE_SQL, persisted=True))  # Composite score for venue proximity
     
     # Metadata
-    data_source = Column(String(200), default='FBI NIBRS')
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    data_source: Mapped[str | None] = mapped_column(String(200), default='FBI NIBRS')
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Indexes for performance
     __table_args__ = (
-        Index('idx_nibrs_year_state', 'year', 'state'),
-        Index('idx_nibrs_location', 'latitude', 'longitude'),
+        Index('idx_nibrs_year_state', 'year', 'state',
+              postgresql_include=['total_offenses', 'overall_risk_score', 'violent_crime_rate']),
+        Index('idx_nibrs_geog', 'geog', postgresql_using='gist'),
         Index('idx_nibrs_agency', 'agency_name', 'year'),
         Index('idx_nibrs_city', 'city', 'state'),
+        Index('idx_nibrs_city_trgm', 'city', postgresql_using='gin',
+              postgresql_ops={'city': 'gin_trgm_ops'}),
+        Index('idx_nibrs_risk', 'overall_risk_score'),
+        # The default min_risk (50) of the map endpoints; any min_risk >= 50
+        # is implied by the predicate, so only the high-risk slice is scanned
+        Index('idx_nibrs_high_risk', text('overall_risk_score DESC'), 'year',
+              postgresql_where=text('overall_risk_score >= 50')),
+        # Located rows of a year / state, highest risk first (map endpoints)
+        Index('idx_nibrs_year_state_risk', 'year', 'state', text('overall_risk_score DESC'),
+              postgresql_where=text('latitude IS NOT NULL AND longitude IS NOT NULL')),
+        Index('idx_nibrs_created_brin', 'created_at',
+              postgresql_using='brin', postgresql_with={'pages_per_range': 32}),
     )
     
     def __repr__(self):
@@ -394,60 +635,59 @@ class NIBRSCrimeData(Base):
     
     def calculate_risk_score(self):
         """
-        Calculate overall risk score based on violent crimes
+        Overall risk score based on violent crimes
         Higher weight on violent crimes, human trafficking, and drug offenses
-        """
-        if not self.total_offenses or self.total_offenses == 0:
-            self.overall_risk_score = 0.0
-            return 0.0
-        
-        # Weighted scoring
-        violent_score = (
-            (self.murder_nonnegligent_manslaughter or 0) * 10.0 +
-            (self.aggravated_assault or 0) * 5.0 +
-            (self.rape or 0) * 5.0 +
-            (self.robbery or 0) * 3.0 +
-            (self.kidnapping_abduction or 0) * 8.0 +
-            (self.human_trafficking_offenses or 0) * 10.0
-        )
-        
-        drug_score = (self.drug_narcotic_offenses or 0) * 2.0
-        property_score = (self.burglary or 0) * 0.5
-        
-        total_score = violent_score + drug_score + property_score
-        
-        # Normalize to 0-100 scale
-        max_possible = self.total_offenses * 10  # Theoretical max if all were murders
-        self.overall_risk_score = min((total_score / max_possible) * 100, 100) if max_possible > 0 else 0
         
+        Computed by the database (see NIBRS_RISK_SCORE_SQL); this returns the
+        stored value, which is current after the row is flushed and refreshed.
+        """
         return self.overall_risk_score
 
 
+# Common agency-type suffixes, stripped (repeatedly, any case) from the end of
+# a name. The pattern is valid in both Python and PostgreSQL regex syntax
+AGENCY_SUFFIX_PATTERN = (
+    r"(?:\s+(?:Police Department|PD|Sheriff's Office|Sheriff Office|Sheriff|Police"
+    r"|Dept\.?|Department|City|Town|Village|Borough|Township|County|Metro|Metropolitan))+\s*$"
+)
+_AGENCY_SUFFIX_RE = re.compile(AGENCY_SUFFIX_PATTERN, re.IGNORECASE)
+
+# City inference in the database: extract_city(agency_name) strips the
+# suffixes, and a trigram index on city serves fuzzy (%, similarity())
+# matches of venue cities. Created by scripts/setup_database_postgresql.py
+# and scripts/load_nibrs_data.py
+EXTRACT_CITY_FUNCTION_SQL = f"""
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    
+    CREATE OR REPLACE FUNCTION extract_city(agency text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+        SELECT CASE WHEN length(city) > 1 THEN city END
+        FROM regexp_replace(btrim(agency), {"'" + AGENCY_SUFFIX_PATTERN.replace("'", "''") + "'"}, '', 'i') AS city
+    $$;
+"""
+
+# Fill in the city of rows loaded without one
+INFER_NIBRS_CITIES_SQL = """
+    UPDATE nibrs_crime_data
+    SET city = extract_city(agency_name)
+    WHERE city IS NULL AND agency_name IS NOT NULL
+"""
+
+
 # Helper function to geocode agency by extracting city from agency name
 def extract_city_from_agency_name(agency_name, state):
     """
     Extract city name from agency name
     E.g., "Apache Junction" from "Apache Junction Police Department"
+    
+    Client-side preview only: stored rows get their city from the
+    extract_city() SQL function (see INFER_NIBRS_CITIES_SQL).
     """
     if not agency_name:
         return None
     
-    # Common patterns
-    agency_name = agency_name.strip()
-    
-    # Remove common suffixes
-    suffixes = [
-        ' Police Department', ' PD', ' Sheriff\'s Office', ' Sheriff Office',
-        ' Sheriff', ' Police', ' Dept', ' Department', ' City', ' Town',
-        ' Village', ' Borough', ' Township', ' County'
-    ]
-    
-    city = agency_name
-    for suffix in suffixes:
-        if city.endswith(suffix):
-            city = city[:-len(suffix)].strip()
-    
-    return city if city else None
+    city = _AGENCY_SUFFIX_RE.sub('', agency_name.strip())
+    return city if len(city) > 1 else None
 
 
 # State-level coordinates (for agencies without city-level geocoding)
@@ -505,43 +745,99 @@ STATE_COORDINATES = {
     'DISTRICT OF COLUMBIA': {'lat': 38.907192, 'lon': -77.036871},
 }
 
+# Parallel-array form of STATE_COORDINATES (see lookup_states)
+_STATE_LATS = np.fromiter((loc['lat'] for loc in STATE_COORDINATES.values()), dtype=np.float64)
+_STATE_LONS = np.fromiter((loc['lon'] for loc in STATE_COORDINATES.values()), dtype=np.float64)
+_STATE_IDX = {name: i for i, name in enumerate(STATE_COORDINATES)}
 
-# Helper function to geocode agency by extracting city from agency name
-def extract_city_from_agency_name(agency_name, state):
+
+def lookup_states(names):
     """
-    Extract city name from agency name
-    E.g., "Apache Junction" from "Apache Junction Police Department"
+    State-centroid coordinates for a sequence of state names
+    
+    Args:
+        names: Full state names (matched case-insensitively)
+        
+    Returns:
+        (lats, lons) arrays aligned with names; unknown states get NaN
     """
-    if not agency_name:
-        return None
+    idx = np.fromiter(
+        (_STATE_IDX.get(str(name).upper(), -1) for name in names),
+        dtype=np.int32, count=len(names)
+    )
+    found = idx >= 0
+    idx = np.where(found, idx, 0)
+    
+    return (
+        np.where(found, _STATE_LATS[idx], np.nan),
+        np.where(found, _STATE_LONS[idx], np.nan),
+    )
+
+
+# Numba is optional: the compiled Haversine kernels below are used when it is
+# installed, otherwise the math / numpy versions are
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# NaN-safe subset of fastmath (no 'nnan'/'ninf'): missing coordinates must
+# still come out as NaN distances
+_FASTMATH = {'contract', 'afn', 'reassoc', 'arcp', 'nsz'}
+
+if njit is not None:
+    @njit(cache=True, fastmath=_FASTMATH, boundscheck=False)
+    def _haversine_nb(lat1, lon1, lat2, lon2):
+        lat1, lon1, lat2, lon2 = radians(lat1), radians(lon1), radians(lat2), radians(lon2)
+        a = (sin((lat2 - lat1) / 2) ** 2
+             + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2)
+        return 2 * asin(sqrt(a)) * 6371
+
+    @njit(parallel=True, cache=True, fastmath=_FASTMATH, boundscheck=False)
+    def _haversine_matrix(lats1, lons1, lats2, lons2):
+        out = np.empty((lats1.shape[0], lats2.shape[0]))
+        for i in prange(lats1.shape[0]):
+            for j in range(lats2.shape[0]):
+                out[i, j] = _haversine_nb(lats1[i], lons1[i], lats2[j], lons2[j])
+        return out
+else:
+    _haversine_nb = None
+    _haversine_matrix = None
+
+
+# Helper function to calculate distance between two points
+def calculate_distance_bulk(lat1, lon1, lat2, lon2):
+    """
+    Haversine distance in kilometers between arrays of points
     
-    # Common patterns
-    agency_name = agency_name.strip()
+    Inputs are degrees and broadcast like any numpy operation, e.g. pass
+    lat1[:, None], lon1[:, None] with lat2, lon2 for an (N, M) matrix.
+    """
+    # Convert to radians
+    lon1, lat1, lon2, lat2 = map(np.radians, [lon1, lat1, lon2, lat2])
     
-    # Remove common suffixes
-    suffixes = [
-        ' Police Department', ' PD', ' Sheriff\'s Office', ' Sheriff Office',
-        ' Sheriff', ' Police', ' Dept', ' Department', ' City', ' Town',
-        ' Village', ' Borough', ' Township', ' County'
-    ]
+    # Haversine formula
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
+    c = 2 * np.arcsin(np.sqrt(a))
     
-    city = agency_name
-    for suffix in suffixes:
-        if city.endswith(suffix):
-            city = city[:-len(suffix)].strip()
+    # Radius of earth in kilometers
+    r = 6371
     
-    return city if city else None
+    return c * r
+
 
-# Helper function to calculate distance between two points
 def calculate_distance(lat1, lon1, lat2, lon2):
     """
     Calculate distance between two points using Haversine formula
     Returns distance in kilometers
     """
-    from math import radians, cos, sin, asin, sqrt
+    if _haversine_nb is not None:
+        return _haversine_nb(float(lat1), float(lon1), float(lat2), float(lon2))
     
     # Convert to radians
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+    lon1, lat1, lon2, lat2 = radians(lon1), radians(lat1), radians(lon2), radians(lat2)
     
     # Haversine formula
     dlon = lon2 - lon1
@@ -552,4 +848,212 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     # Radius of earth in kilometers
     r = 6371
     
-    return c * r
\ No newline at end of file
+    return c * r
+
+
+def calculate_distance_matrix(lats1, lons1, lats2, lons2):
+    """
+    (N, M) Haversine distance matrix in kilometers between two point sets
+    
+    Uses the parallel Numba kernel when available, numpy broadcasting otherwise.
+    """
+    lats1, lons1, lats2, lons2 = (np.ascontiguousarray(x, dtype=np.float64)
+                                  for x in (lats1, lons1, lats2, lons2))
+    if _haversine_matrix is not None:
+        return _haversine_matrix(lats1, lons1, lats2, lons2)
+    return calculate_distance_bulk(lats1[:, np.newaxis], lons1[:, np.newaxis],
+                                   lats2[np.newaxis, :], lons2[np.newaxis, :])
+
+
+# Venue coordinates, cached per process. Venue edits made through the ORM
+# clear it right away; edits from another process (the venue loader, other
+# workers) are picked up once the arrays are VENUE_CACHE_SECONDS old.
+VENUE_CACHE_SECONDS = 300
+_VENUE_POINTS = None
+_VENUE_POINTS_TS = 0.0
+
+
+def load_venues_array(connection):
+    """
+    Venue coordinates as parallel arrays, cached for VENUE_CACHE_SECONDS
+    
+    Args:
+        connection: Connection or Session used for the load
+        
+    Returns:
+        (ids, lats, lons) numpy arrays for all located venues
+    """
+    global _VENUE_POINTS, _VENUE_POINTS_TS
+    if _VENUE_POINTS is None or time.monotonic() - _VENUE_POINTS_TS > VENUE_CACHE_SECONDS:
+        rows = connection.execute(
+            select(WorldCupVenue.id, WorldCupVenue.latitude, WorldCupVenue.longitude)
+            .where(WorldCupVenue.latitude.isnot(None), WorldCupVenue.longitude.isnot(None))
+        ).all()
+        points = (
+            np.array([r.id for r in rows], dtype=np.int64),
+            np.array([r.latitude for r in rows], dtype=np.float64),
+            np.array([r.longitude for r in rows], dtype=np.float64),
+        )
+        if not rows:
+            # Venues not loaded yet, try again on the next call
+            return points
+        _VENUE_POINTS = points
+        _VENUE_POINTS_TS = time.monotonic()
+    return _VENUE_POINTS
+
+
+def clear_venue_cache():
+    """Drop this process's cached venue arrays; the next load_venues_array() re-reads them"""
+    global _VENUE_POINTS
+    _VENUE_POINTS = None
+
+
+@event.listens_for(WorldCupVenue, 'after_insert')
+@event.listens_for(WorldCupVenue, 'after_update')
+@event.listens_for(WorldCupVenue, 'after_delete')
+def invalidate_venue_cache(mapper, connection, target):
+    clear_venue_cache()
+
+
+# Nearest venue (KNN over the GiST-indexed geog columns) for located rows
+# that don't have one yet; spherical distance to match calculate_distance.
+# Covers rows located by raw SQL / Core UPDATEs, which skip set_nearest_venue
+NEAREST_VENUE_BACKFILL_SQL = """
+    UPDATE {table} t
+    SET (nearest_venue_id, nearest_venue_km) = (
+        SELECT v.id, ST_Distance(t.geog, v.geog, false) / 1000
+        FROM worldcup_venues v
+        WHERE v.geog IS NOT NULL
+        ORDER BY t.geog <-> v.geog
+        LIMIT 1
+    )
+    WHERE t.geog IS NOT NULL
+      AND t.nearest_venue_id IS NULL
+"""
+
+
+@event.listens_for(SmugglingIncident, 'before_insert')
+@event.listens_for(CBPDrugSeizure, 'before_insert')
+def set_nearest_venue(mapper, connection, target):
+    """
+    Store the nearest venue and its distance on located rows at insert time,
+    so proximity queries read an indexed column instead of computing
+    Haversine distances per request
+    """
+    if target.latitude is None or target.longitude is None:
+        return
+    
+    ids, lats, lons = load_venues_array(connection)
+    if len(ids) == 0:
+        return
+    
+    distances = calculate_distance_bulk(target.latitude, target.longitude, lats, lons)
+    nearest = int(np.argmin(distances))
+    target.nearest_venue_id = int(ids[nearest])
+    target.nearest_venue_km = float(distances[nearest])
+
+
+def route_linestring(coordinates):
+    """
+    EWKT LINESTRING for a route_coordinates list, or None if it has fewer
+    than two usable points
+    """
+    points = [
+        f"{float(point['lon'])} {float(point['lat'])}"
+        for point in coordinates or []
+        if point.get('lat') is not None and point.get('lon') is not None
+    ]
+    if len(points) < 2:
+        return None
+    return f"SRID=4326;LINESTRING({', '.join(points)})"
+
+
+@event.listens_for(SmugglingRoute, 'before_insert')
+@event.listens_for(SmugglingRoute, 'before_update')
+def set_route_geom(mapper, connection, target):
+    """Keep route_geom in step with route_coordinates"""
+    target.route_geom = route_linestring(target.route_coordinates)
+
+
+def split_list(value):
+    """
+    Split a comma-separated string into the list stored in an ARRAY column
+    
+    Args:
+        value: String such as "Guatemala, Honduras", an existing list, or None/NaN
+    
+    Returns:
+        List of non-empty stripped items, or None if there are none
+    """
+    if value is None or (isinstance(value, float) and isnan(value)):
+        return None
+    items = value if isinstance(value, (list, tuple)) else str(value).split(',')
+    items = [str(item).strip() for item in items if str(item).strip()]
+    return items or None
+
+
+def bulk_insert(connection, model, rows, chunk_size=10_000):
+    """
+    Insert many rows with Core multi-VALUES INSERTs instead of session.add()
+    
+    Core inserts skip the ORM insert events, so the derived fields those
+    set (nearest venue, route_geom) are filled here, vectorized per chunk.
+    Keys missing from some rows are inserted as NULL.
+    
+    Args:
+        connection: Connection or Session to execute on (caller commits)
+        model: Mapped class to insert into
+        rows: List of column-name -> value dicts
+        chunk_size: Rows per executemany batch
+        
+    Returns:
+        Number of rows inserted
+    """
+    if not rows:
+        return 0
+    
+    has_nearest_venue = 'nearest_venue_id' in model.__table__.c
+    keys = list(dict.fromkeys(key for row in rows for key in row))
+    if has_nearest_venue:
+        keys += [key for key in ('nearest_venue_id', 'nearest_venue_km') if key not in keys]
+    stmt = insert(model.__table__)
+    inserted = 0
+    
+    for start in range(0, len(rows), chunk_size):
+        batch = [{key: row.get(key) for key in keys} for row in rows[start:start + chunk_size]]
+        
+        if has_nearest_venue:
+            _fill_nearest_venues(connection, batch)
+        if model is SmugglingRoute:
+            for row in batch:
+                row['route_geom'] = route_linestring(row.get('route_coordinates'))
+        
+        connection.execute(stmt, batch)
+        inserted += len(batch)
+    
+    return inserted
+
+
+def _fill_nearest_venues(connection, batch):
+    """Bulk version of set_nearest_venue for a list of row dicts"""
+    ids, lats, lons = load_venues_array(connection)
+    if len(ids) == 0:
+        return
+    
+    todo = [row for row in batch
+            if row.get('nearest_venue_id') is None
+            and row.get('latitude') is not None and row.get('longitude') is not None]
+    if not todo:
+        return
+    
+    distances = calculate_distance_matrix(
+        np.array([row['latitude'] for row in todo], dtype=np.float64),
+        np.array([row['longitude'] for row in todo], dtype=np.float64),
+        lats, lons
+    )
+    nearest = np.argmin(distances, axis=1)
+    nearest_km = distances[np.arange(len(todo)), nearest]
+    
+    for row, pos, km in zip(todo, nearest.tolist(), nearest_km.tolist()):
+        row['nearest_venue_id'] = int(ids[pos])
+        row['nearest_venue_km'] = km
@@ -2,15 +2,15 @@
 API Routes for World Cup 2026 Intelligence Platform
 Includes: Venues, Incidents, CBP Drug Seizures, NIBRS Crime Data
 """
-from flask import Blueprint, jsonify, request
-from src.extensions import db
-from sqlalchemy import func, desc
+import orjson
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from src.extensions import cache, cache_ok, db
+from sqlalchemy import Float, Numeric, Text, cast, func, desc, select, true
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from datetime import datetime
-from math import radians, cos, sin, asin, sqrt
-from src.models.models import *
 
 # Import with CORRECT model names from your models.py
-from src.models.models import WorldCupVenue, SmugglingIncident, CBPDrugSeizure, NIBRSCrimeData
+from src.models.models import WorldCupVenue, SmugglingIncident, CBPDrugSeizure, NIBRSCrimeData, load_venues_array
 
 # Create aliases for cleaner code
 Venue = WorldCupVenue
@@ -18,33 +18,136 @@ Incident = SmugglingIncident
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+# Upper bound on any ?limit= a client can request
+MAX_LIMIT = 10000
+
+
+def json_rows(stmt, *order_by):
+    """
+    Run a SELECT and let PostgreSQL encode its rows as a JSON array
+    
+    The column labels become the object keys. The array comes back as one
+    string and is embedded in the response as-is (orjson.Fragment), so no
+    per-row Python objects are built.
+    
+    Args:
+        stmt: Select whose labeled columns are the row fields
+        *order_by: Names of stmt columns to order the array by; prefix
+            with '-' for descending
+        
+    Returns:
+        (orjson.Fragment of the array, number of rows)
+    """
+    t = stmt.subquery('t')
+    row = t.table_valued()
+    if order_by:
+        row = aggregate_order_by(row, *_order_keys(t, order_by))
+    
+    payload, count = db.session.execute(
+        select(func.coalesce(cast(func.json_agg(row), Text), '[]'), func.count())
+        .select_from(t)
+    ).one()
+    return orjson.Fragment(payload), count
+
+
+def stream_json_rows(stmt, key, fields, *order_by, chunk_size=1000):
+    """
+    Stream a SELECT as ``{"success": true, **fields, key: [...], "count": n}``
+    
+    PostgreSQL encodes each row (row_to_json) and the rows are read through
+    a server-side cursor, chunk_size at a time, and written out as they
+    arrive, so neither the row list nor the whole JSON body is held in
+    memory.
+    
+    Args:
+        stmt: Select whose labeled columns are the row fields
+        key: Response key of the row array
+        fields: Other top-level response fields
+        *order_by: Names of stmt columns to order the rows by (see json_rows)
+        chunk_size: Rows fetched and written per chunk
+        
+    Returns:
+        Streaming application/json Response
+    """
+    t = stmt.subquery('t')
+    result = db.session.execute(
+        select(cast(func.row_to_json(t.table_valued()), Text))
+        .select_from(t)
+        .order_by(*_order_keys(t, order_by)),
+        execution_options={'stream_results': True, 'yield_per': chunk_size}
+    ).scalars()
+    
+    def generate():
+        # opening fields, then the array without its closing bracket
+        yield orjson.dumps({'success': True, **fields})[:-1] + f',"{key}":['.encode()
+        count = 0
+        for chunk in result.partitions():
+            yield (b',' if count else b'') + ','.join(chunk).encode()
+            count += len(chunk)
+        yield f'],"count":{count}}}\n'.encode()
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+@api_bp.after_request
+def add_etag(response):
+    """
+    Tag complete GET responses with a content ETag and answer a matching
+    If-None-Match with 304 (no body). Streamed responses are left alone.
+    """
+    if request.method == 'GET' and response.status_code == 200 and not response.is_streamed:
+        response.add_etag()
+        response.make_conditional(request)
+    return response
+
+
+def limit_arg(default, maximum=MAX_LIMIT):
+    """
+    Read the ``limit`` query parameter, clamped to 1..maximum
+    
+    LIMIT is always sent as a bound parameter, so the statement text (and
+    SQLAlchemy's compiled-statement cache entry) is the same for every value.
+    
+    Args:
+        default: Value used when the parameter is missing or not an integer
+        maximum: Largest limit a client may ask for
+        
+    Returns:
+        int limit
+    """
+    limit = request.args.get('limit', default=default, type=int)
+    return min(max(limit, 1), maximum)
+
+
+def _order_keys(t, order_by):
+    # '-name' -> t.name DESC
+    return [t.c[name[1:]].desc() if name.startswith('-') else t.c[name]
+            for name in order_by]
+
 
 # ============================================================================
 # VENUES
 # ============================================================================
 
 @api_bp.route('/venues', methods=['GET'])
+@cache.cached(timeout=3600, key_prefix='api/venues', response_filter=cache_ok)
 def get_venues():
     """Get all World Cup 2026 venues"""
     try:
-        venues = db.session.query(Venue).all()
-        
-        venues_data = []
-        for venue in venues:
-            venues_data.append({
-                'id': venue.id,
-                'name': venue.venue_name,
-                'city': venue.city,
-                'country': venue.country,
-                'capacity': venue.capacity,
-                'latitude': float(venue.latitude) if venue.latitude else None,
-                'longitude': float(venue.longitude) if venue.longitude else None
-            })
+        venues_data, count = json_rows(select(
+            Venue.id,
+            Venue.venue_name.label('name'),
+            Venue.city,
+            Venue.country,
+            Venue.capacity,
+            Venue.latitude,
+            Venue.longitude
+        ))
         
         return jsonify({
             'success': True,
             'venues': venues_data,
-            'count': len(venues_data)
+            'count': count
         })
         
     except Exception as e:
@@ -58,6 +161,23 @@ def get_venues():
 # INCIDENTS (IOM Missing Migrants / Smuggling Incidents)
 # ============================================================================
 
+# Statements are built once at import; handlers only add the optional
+# filters (each filter combination is compiled once, then reused from
+# SQLAlchemy's compiled cache, and keeps plain index-friendly predicates)
+INCIDENTS_SELECT = select(
+    Incident.id,
+    Incident.incident_date.label('date'),
+    Incident.country,
+    Incident.region,
+    Incident.latitude,
+    Incident.longitude,
+    func.coalesce(Incident.number_dead, 0).label('total_dead'),
+    func.coalesce(Incident.number_missing, 0).label('total_missing'),
+    Incident.incident_type,
+    Incident.location_description.label('description')
+)
+
+
 @api_bp.route('/incidents', methods=['GET'])
 def get_incidents():
     """Get migration/smuggling incidents with optional filters"""
@@ -67,10 +187,11 @@ def get_incidents():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         incident_type = request.args.get('type')
-        limit = request.args.get('limit', default=1000, type=int)
+        limit = limit_arg(1000)
         
-        # Build query
-        query = db.session.query(Incident)
+        # Build query from the prebuilt column list; PostgreSQL builds the
+        # JSON rows
+        query = INCIDENTS_SELECT
         
         # Apply filters
         if country:
@@ -96,29 +217,8 @@ def get_incidents():
         # Apply limit
         query = query.limit(limit)
         
-        # Execute query
-        incidents = query.all()
-        
-        # Format results
-        incidents_data = []
-        for incident in incidents:
-            incidents_data.append({
-                'id': incident.id,
-                'date': incident.incident_date.isoformat() if incident.incident_date else None,
-                'country': incident.country,
-                'region': incident.region,
-                'latitude': float(incident.latitude) if incident.latitude else None,
-                'longitude': float(incident.longitude) if incident.longitude else None,
-                'total_dead': incident.number_dead or 0,
-                'total_missing': incident.number_missing or 0,
-                'incident_type': incident.incident_type,
-                'description': incident.location_description
-            })
-        
-        return jsonify({
-            'success': True,
-            'incidents': incidents_data,
-            'count': len(incidents_data),
+        # Execute query and stream the rows out
+        return stream_json_rows(query, 'incidents', {
             'filters': {
                 'country': country,
                 'start_date': start_date,
@@ -140,27 +240,26 @@ def get_incidents():
 # ============================================================================
 
 @api_bp.route('/statistics', methods=['GET'])
+@cache.cached(timeout=300, query_string=True, response_filter=cache_ok)
 def get_statistics():
     """Get overall platform statistics"""
     try:
-        # Count venues
-        total_venues = db.session.query(Venue).count()
-        
-        # Count incidents
-        total_incidents = db.session.query(Incident).count()
-        
-        # Sum casualties
-        casualties = db.session.query(
-            func.coalesce(func.sum(Incident.number_dead), 0) + 
-            func.coalesce(func.sum(Incident.number_missing), 0)
-        ).scalar() or 0
+        # Venue count, incident count and casualties in one round trip
+        total_venues, total_incidents, casualties = db.session.execute(
+            select(
+                select(func.count()).select_from(Venue).scalar_subquery(),
+                func.count(),
+                func.coalesce(func.sum(Incident.number_dead), 0) +
+                func.coalesce(func.sum(Incident.number_missing), 0)
+            ).select_from(Incident)
+        ).one()
         
         return jsonify({
             'success': True,
             'statistics': {
                 'total_venues': total_venues,
                 'total_incidents': total_incidents,
-                'total_casualties': int(casualties)
+                'total_casualties': casualties
             }
         })
         
@@ -175,6 +274,25 @@ def get_statistics():
 # CBP DRUG SEIZURES
 # ============================================================================
 
+# Located seizures only
+CBP_SEIZURES_SELECT = select(
+    CBPDrugSeizure.id,
+    CBPDrugSeizure.fiscal_year.label('year'),        # ✅ correct field
+    CBPDrugSeizure.month,
+    CBPDrugSeizure.drug_type,
+    CBPDrugSeizure.area_of_responsibility.label('office'),  # ✅ correct field
+    CBPDrugSeizure.city,
+    CBPDrugSeizure.state,
+    CBPDrugSeizure.latitude,
+    CBPDrugSeizure.longitude,
+    func.coalesce(CBPDrugSeizure.event_count, 0).label('event_count'),
+    func.coalesce(CBPDrugSeizure.quantity_lbs, 0).label('quantity_lbs')
+).filter(
+    CBPDrugSeizure.latitude.isnot(None),
+    CBPDrugSeizure.longitude.isnot(None)
+)
+
+
 @api_bp.route('/cbp-seizures', methods=['GET'])
 def get_cbp_seizures():
     """Get CBP drug seizure data with optional filters"""
@@ -183,13 +301,10 @@ def get_cbp_seizures():
         drug_type = request.args.get('drug_type')
         year = request.args.get('year', type=int)   # UI uses "year", DB uses fiscal_year
         state = request.args.get('state')
-        limit = request.args.get('limit', default=10000, type=int)
+        limit = limit_arg(10000)
 
         # Base query – only rows with coordinates
-        query = db.session.query(CBPDrugSeizure).filter(
-            CBPDrugSeizure.latitude.isnot(None),
-            CBPDrugSeizure.longitude.isnot(None)
-        )
+        query = CBP_SEIZURES_SELECT
 
         # Filters
         if drug_type:
@@ -202,38 +317,17 @@ def get_cbp_seizures():
         if state:
             query = query.filter(CBPDrugSeizure.state == state.upper())
 
-        # Order and limit
+        # Order and limit (the streamed rows keep the same order)
         query = query.order_by(desc(CBPDrugSeizure.event_count)).limit(limit)
 
-        seizures = query.all()
-
-        seizures_data = []
-        for s in seizures:
-            seizures_data.append({
-                'id': s.id,
-                'year': s.fiscal_year,                     # ✅ correct field
-                'month': s.month,
-                'drug_type': s.drug_type,
-                'office': s.area_of_responsibility,        # ✅ correct field
-                'city': s.city,
-                'state': s.state,
-                'latitude': float(s.latitude) if s.latitude is not None else None,
-                'longitude': float(s.longitude) if s.longitude is not None else None,
-                'event_count': s.event_count or 0,
-                'quantity_lbs': float(s.quantity_lbs or 0),
-            })
-
-        return jsonify({
-            'success': True,
-            'seizures': seizures_data,
-            'count': len(seizures_data),
+        return stream_json_rows(query, 'seizures', {
             'filters': {
                 'drug_type': drug_type,
                 'year': year,
                 'state': state,
                 'limit': limit,
             },
-        })
+        }, '-event_count')
 
     except Exception as e:
         return jsonify({
@@ -246,6 +340,7 @@ def get_cbp_seizures():
 # ============================================================================
 
 @api_bp.route('/cbp-statistics', methods=['GET'])
+@cache.cached(timeout=300, query_string=True, response_filter=cache_ok)
 def get_cbp_statistics():
     """
     Return aggregated statistics for CBP drug seizures.
@@ -258,7 +353,18 @@ def get_cbp_statistics():
         year = request.args.get('year', type=int)
         drug_type = request.args.get('drug_type')
 
-        query = db.session.query(CBPDrugSeizure)
+        # Both breakdowns in one scan: GROUPING SETS returns the per-drug
+        # rows and the per-year rows, told apart by GROUPING(drug_type)
+        query = select(
+            func.grouping(CBPDrugSeizure.drug_type).label('by_year'),
+            CBPDrugSeizure.drug_type,
+            CBPDrugSeizure.fiscal_year,
+            func.count().label('rows'),
+            func.coalesce(func.sum(CBPDrugSeizure.event_count), 0).label('events'),
+            func.coalesce(func.sum(CBPDrugSeizure.quantity_lbs), 0.0).label('quantity_lbs')
+        ).group_by(
+            func.grouping_sets(CBPDrugSeizure.drug_type, CBPDrugSeizure.fiscal_year)
+        )
 
         # Apply filters
         if year:
@@ -266,28 +372,24 @@ def get_cbp_statistics():
         if drug_type:
             query = query.filter(CBPDrugSeizure.drug_type == drug_type)
 
-        seizures = query.all()
-
-        total_events = sum(s.event_count or 0 for s in seizures)
-        total_quantity = sum(float(s.quantity_lbs or 0) for s in seizures)
-
-        # Breakdown by drug type
+        total_rows = 0
+        total_events = 0
+        total_quantity = 0.0
         drug_breakdown = {}
-        for s in seizures:
-            dt = s.drug_type or "UNKNOWN"
-            if dt not in drug_breakdown:
-                drug_breakdown[dt] = {"events": 0, "quantity_lbs": 0.0}
-            drug_breakdown[dt]["events"] += s.event_count or 0
-            drug_breakdown[dt]["quantity_lbs"] += float(s.quantity_lbs or 0)
-
-        # Breakdown by year
         year_breakdown = {}
-        for s in seizures:
-            y = s.fiscal_year or 0
-            if y not in year_breakdown:
-                year_breakdown[y] = {"events": 0, "quantity_lbs": 0.0}
-            year_breakdown[y]["events"] += s.event_count or 0
-            year_breakdown[y]["quantity_lbs"] += float(s.quantity_lbs or 0)
+        for row in db.session.execute(query):
+            if row.by_year:
+                key, breakdown = row.fiscal_year or 0, year_breakdown
+            else:
+                key, breakdown = row.drug_type or "UNKNOWN", drug_breakdown
+                # every row is in exactly one drug group
+                total_rows += row.rows
+                total_events += row.events
+                total_quantity += row.quantity_lbs
+
+            entry = breakdown.setdefault(key, {"events": 0, "quantity_lbs": 0.0})
+            entry["events"] += row.events
+            entry["quantity_lbs"] += row.quantity_lbs
 
         return jsonify({
             "success": True,
@@ -296,7 +398,7 @@ def get_cbp_statistics():
                 "drug_type": drug_type
             },
             "statistics": {
-                "total_rows": len(seizures),
+                "total_rows": total_rows,
                 "total_events": total_events,
                 "total_quantity_lbs": round(total_quantity, 2),
                 "drug_breakdown": drug_breakdown,
@@ -312,7 +414,26 @@ def get_cbp_statistics():
 # NIBRS CRIME DATA
 # ============================================================================
 
+# Columns behind a NIBRS GeoJSON feature, in the order the handlers unpack
+# them: coordinates, then the properties (missing counts read as 0)
+NIBRS_FEATURE_COLUMNS = (
+    NIBRSCrimeData.longitude,
+    NIBRSCrimeData.latitude,
+    NIBRSCrimeData.agency_name,
+    NIBRSCrimeData.city,
+    NIBRSCrimeData.state,
+    NIBRSCrimeData.year,
+    func.coalesce(NIBRSCrimeData.overall_risk_score, 0.0),
+    func.coalesce(NIBRSCrimeData.total_offenses, 0),
+    func.coalesce(NIBRSCrimeData.crimes_against_persons, 0),
+    func.coalesce(NIBRSCrimeData.crimes_against_property, 0),
+    func.coalesce(NIBRSCrimeData.murder_nonnegligent_manslaughter, 0),
+    func.coalesce(NIBRSCrimeData.human_trafficking_offenses, 0),
+    func.coalesce(NIBRSCrimeData.drug_narcotic_offenses, 0)
+)
+
 @api_bp.route('/nibrs/statistics', methods=['GET'])
+@cache.cached(timeout=300, query_string=True, response_filter=cache_ok)
 def get_nibrs_statistics():
     """
     Get overall NIBRS crime statistics
@@ -328,8 +449,16 @@ def get_nibrs_statistics():
         year = request.args.get('year', type=int)
         state = request.args.get('state', type=str)
         
-        # Base query
-        query = db.session.query(NIBRSCrimeData)
+        # All totals in one aggregate row
+        query = db.session.query(
+            func.count(),
+            func.coalesce(func.sum(NIBRSCrimeData.total_offenses), 0),
+            func.coalesce(func.sum(NIBRSCrimeData.crimes_against_persons), 0),
+            func.coalesce(func.sum(NIBRSCrimeData.crimes_against_property), 0),
+            func.coalesce(func.sum(NIBRSCrimeData.murder_nonnegligent_manslaughter), 0),
+            func.coalesce(func.sum(NIBRSCrimeData.drug_narcotic_offenses), 0),
+            func.coalesce(func.sum(NIBRSCrimeData.human_trafficking_offenses), 0)
+        )
         
         # Apply filters
         if year:
@@ -337,17 +466,8 @@ def get_nibrs_statistics():
         if state:
             query = query.filter(NIBRSCrimeData.state == state.upper())
         
-        # Get all results
-        results = query.all()
-        
-        # Calculate totals
-        total_records = len(results)
-        total_offenses = sum(r.total_offenses or 0 for r in results)
-        total_violent = sum(r.crimes_against_persons or 0 for r in results)
-        total_property = sum(r.crimes_against_property or 0 for r in results)
-        total_homicides = sum(r.murder_nonnegligent_manslaughter or 0 for r in results)
-        total_drug_crimes = sum(r.drug_narcotic_offenses or 0 for r in results)
-        total_human_trafficking = sum(r.human_trafficking_offenses or 0 for r in results)
+        (total_records, total_offenses, total_violent, total_property,
+         total_homicides, total_drug_crimes, total_human_trafficking) = query.one()
         
         return jsonify({
             'success': True,
@@ -394,7 +514,7 @@ def get_nibrs_geojson():
         start_year = request.args.get('start_year', type=int)
         end_year = request.args.get('end_year', type=int)
         min_risk = request.args.get('min_risk', default=50, type=float)
-        limit = request.args.get('limit', default=1000, type=int)
+        limit = limit_arg(1000)
         crime_type = request.args.get('crime_type', default='all', type=str)
         state = request.args.get('state', type=str)
         
@@ -410,9 +530,11 @@ def get_nibrs_geojson():
             query = query.filter(NIBRSCrimeData.year == year)
         
         # Apply state filter
-        if year:
-            query = query.filter(NIBRSCrimeData.year == year)
-        elif start_year or end_year:
+        if state:
+            query = query.filter(NIBRSCrimeData.state == state.upper())
+        
+        # Apply year range (when no single year is given)
+        if not year and (start_year or end_year):
             if start_year:
                 query = query.filter(NIBRSCrimeData.year >= start_year)
             if end_year:
@@ -428,34 +550,34 @@ def get_nibrs_geojson():
         elif crime_type == 'human_trafficking':
             query = query.filter(NIBRSCrimeData.human_trafficking_offenses > 0)
         
-        # Order by risk score and limit
-        results = query.order_by(
+        # Order by risk score and limit; only the mapped columns are read,
+        # streamed in batches instead of hydrating NIBRSCrimeData objects
+        results = query.with_entities(*NIBRS_FEATURE_COLUMNS).order_by(
             NIBRSCrimeData.overall_risk_score.desc()
-        ).limit(limit).all()
+        ).limit(limit).yield_per(500)
         
-        # Build GeoJSON
-        features = []
-        for record in results:
-            features.append({
+        # Build GeoJSON straight from the row tuples
+        features = [
+            {
                 'type': 'Feature',
-                'geometry': {
-                    'type': 'Point',
-                    'coordinates': [float(record.longitude), float(record.latitude)]
-                },
+                'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
                 'properties': {
-                    'agency_name': record.agency_name,
-                    'city': record.city,
-                    'state': record.state,
-                    'year': record.year,
-                    'risk_score': float(record.overall_risk_score or 0),
-                    'total_offenses': record.total_offenses or 0,
-                    'violent_crimes': record.crimes_against_persons or 0,
-                    'property_crimes': record.crimes_against_property or 0,
-                    'homicides': record.murder_nonnegligent_manslaughter or 0,
-                    'human_trafficking': record.human_trafficking_offenses or 0,
-                    'drug_crimes': record.drug_narcotic_offenses or 0
+                    'agency_name': agency_name,
+                    'city': city,
+                    'state': record_state,
+                    'year': record_year,
+                    'risk_score': risk_score,
+                    'total_offenses': total_offenses,
+                    'violent_crimes': violent,
+                    'property_crimes': property_crimes,
+                    'homicides': homicides,
+                    'human_trafficking': human_trafficking,
+                    'drug_crimes': drug_crimes
                 }
-            })
+            }
+            for (lon, lat, agency_name, city, record_state, record_year, risk_score, total_offenses,
+                 violent, property_crimes, homicides, human_trafficking, drug_crimes) in results
+        ]
         
         return jsonify({
             'success': True,
@@ -479,6 +601,7 @@ def get_nibrs_geojson():
 
 
 @api_bp.route('/nibrs/by-state', methods=['GET'])
+@cache.cached(timeout=300, query_string=True, response_filter=cache_ok)
 def get_nibrs_by_state():
     """
     Get crime statistics aggregated by state
@@ -492,39 +615,27 @@ def get_nibrs_by_state():
     try:
         year = request.args.get('year', type=int)
         
-        # Build query
+        # Build query; SUM of integer columns is a bigint and AVG of a
+        # float a float, so the rows come back already typed (no casts)
         query = db.session.query(
             NIBRSCrimeData.state,
-            func.sum(NIBRSCrimeData.total_offenses).label('total_offenses'),
-            func.sum(NIBRSCrimeData.crimes_against_persons).label('violent_crimes'),
-            func.sum(NIBRSCrimeData.murder_nonnegligent_manslaughter).label('homicides'),
-            func.sum(NIBRSCrimeData.drug_narcotic_offenses).label('drug_crimes'),
-            func.sum(NIBRSCrimeData.human_trafficking_offenses).label('human_trafficking'),
-            func.avg(NIBRSCrimeData.overall_risk_score).label('avg_risk_score'),
+            func.coalesce(func.sum(NIBRSCrimeData.total_offenses), 0).label('total_offenses'),
+            func.coalesce(func.sum(NIBRSCrimeData.crimes_against_persons), 0).label('violent_crimes'),
+            func.coalesce(func.sum(NIBRSCrimeData.murder_nonnegligent_manslaughter), 0).label('homicides'),
+            func.coalesce(func.sum(NIBRSCrimeData.drug_narcotic_offenses), 0).label('drug_crimes'),
+            func.coalesce(func.sum(NIBRSCrimeData.human_trafficking_offenses), 0).label('human_trafficking'),
+            func.coalesce(func.avg(NIBRSCrimeData.overall_risk_score), 0.0).label('avg_risk_score'),
             func.count(NIBRSCrimeData.id).label('agency_count')
         ).group_by(NIBRSCrimeData.state)
         
         if year:
             query = query.filter(NIBRSCrimeData.year == year)
         
-        results = query.all()
+        # Highest total offenses first
+        results = query.order_by(desc('total_offenses')).all()
         
         # Format results
-        state_data = []
-        for row in results:
-            state_data.append({
-                'state': row.state,
-                'total_offenses': int(row.total_offenses or 0),
-                'violent_crimes': int(row.violent_crimes or 0),
-                'homicides': int(row.homicides or 0),
-                'drug_crimes': int(row.drug_crimes or 0),
-                'human_trafficking': int(row.human_trafficking or 0),
-                'avg_risk_score': float(row.avg_risk_score or 0),
-                'agency_count': int(row.agency_count)
-            })
-        
-        # Sort by total offenses
-        state_data.sort(key=lambda x: x['total_offenses'], reverse=True)
+        state_data = [row._asdict() for row in results]
         
         return jsonify({
             'success': True,
@@ -541,6 +652,7 @@ def get_nibrs_by_state():
 
 
 @api_bp.route('/nibrs/high-risk-areas', methods=['GET'])
+@cache.cached(timeout=300, query_string=True, response_filter=cache_ok)
 def get_high_risk_areas():
     """
     Get agencies with highest risk scores
@@ -554,38 +666,52 @@ def get_high_risk_areas():
         Array of high-risk agencies sorted by risk score
     """
     try:
-        limit = request.args.get('limit', default=20, type=int)
+        limit = limit_arg(20)
         year = request.args.get('year', type=int)
         min_risk = request.args.get('min_risk', default=50, type=float)
         
-        # Build query
-        query = db.session.query(NIBRSCrimeData).filter(
+        # Build query (plain column tuples, no ORM objects)
+        query = select(
+            NIBRSCrimeData.agency_name,
+            NIBRSCrimeData.city,
+            NIBRSCrimeData.state,
+            NIBRSCrimeData.year,
+            NIBRSCrimeData.overall_risk_score,
+            NIBRSCrimeData.total_offenses,
+            NIBRSCrimeData.crimes_against_persons,
+            NIBRSCrimeData.murder_nonnegligent_manslaughter,
+            NIBRSCrimeData.human_trafficking_offenses,
+            NIBRSCrimeData.drug_narcotic_offenses,
+            NIBRSCrimeData.latitude,
+            NIBRSCrimeData.longitude
+        ).filter(
             NIBRSCrimeData.overall_risk_score >= min_risk
         )
         
         if year:
             query = query.filter(NIBRSCrimeData.year == year)
         
-        results = query.order_by(
+        results = db.session.execute(query.order_by(
             NIBRSCrimeData.overall_risk_score.desc()
-        ).limit(limit).all()
+        ).limit(limit))
         
         # Format results
         high_risk_areas = []
-        for record in results:
+        for (agency_name, city, state, record_year, risk_score, total_offenses, violent,
+             homicides, human_trafficking, drug_crimes, latitude, longitude) in results:
             high_risk_areas.append({
-                'agency_name': record.agency_name,
-                'city': record.city,
-                'state': record.state,
-                'year': record.year,
-                'risk_score': round(record.overall_risk_score or 0, 2),
-                'total_offenses': record.total_offenses or 0,
-                'violent_crimes': record.crimes_against_persons or 0,
-                'homicides': record.murder_nonnegligent_manslaughter or 0,
-                'human_trafficking': record.human_trafficking_offenses or 0,
-                'drug_crimes': record.drug_narcotic_offenses or 0,
-                'latitude': record.latitude,
-                'longitude': record.longitude
+                'agency_name': agency_name,
+                'city': city,
+                'state': state,
+                'year': record_year,
+                'risk_score': round(risk_score or 0, 2),
+                'total_offenses': total_offenses or 0,
+                'violent_crimes': violent or 0,
+                'homicides': homicides or 0,
+                'human_trafficking': human_trafficking or 0,
+                'drug_crimes': drug_crimes or 0,
+                'latitude': latitude,
+                'longitude': longitude
             })
         
         return jsonify({
@@ -635,37 +761,49 @@ def health_check():
         }
     })
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance in miles between two lat/lon points"""
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    return c * 3956  # Earth radius in miles
+# Metres per statute mile (the near-venues distances are in miles)
+METERS_PER_MILE = 1609.344
+
 
 @api_bp.route('/nibrs/near-venues', methods=['GET'])
 def get_nibrs_near_venues():
-    """Get NIBRS data within distance of World Cup venues"""
+    """
+    Get NIBRS data within distance of World Cup venues
+    
+    PostGIS does the whole spatial join: for each candidate row a LATERAL
+    KNN lookup over the venue geog GiST index returns the nearest venue
+    within the distance, and rows with none are dropped.
+    """
     try:
         max_distance = request.args.get('distance', default=100, type=float)
         min_risk = request.args.get('min_risk', default=0, type=float)
-        limit = request.args.get('limit', default=5000, type=int)
+        limit = limit_arg(5000)
         crime_type = request.args.get('crime_type', default='all', type=str)
         start_year = request.args.get('start_year', type=int)
         end_year = request.args.get('end_year', type=int)
         
-        # Get all venues
-        venues = db.session.query(Venue).filter(
-            Venue.latitude.isnot(None),
-            Venue.longitude.isnot(None)
-        ).all()
+        # Located venues, from the per-process venue arrays
+        venues_count = len(load_venues_array(db.session)[0])
         
-        if not venues:
+        if not venues_count:
             return jsonify({'success': False, 'error': 'No venues found', 'features': []}), 404
         
+        # Nearest venue within max_distance of the outer row
+        nearest_venue = select(
+            Venue.venue_name,
+            func.ST_Distance(Venue.geog, NIBRSCrimeData.geog).label('meters')
+        ).filter(
+            func.ST_DWithin(Venue.geog, NIBRSCrimeData.geog, max_distance * METERS_PER_MILE)
+        ).order_by(
+            Venue.geog.op('<->')(NIBRSCrimeData.geog)
+        ).limit(1).lateral('nearest_venue')
+        
         # Build NIBRS query
-        query = db.session.query(NIBRSCrimeData).filter(
+        query = select(
+            *NIBRS_FEATURE_COLUMNS,
+            nearest_venue.c.venue_name,
+            func.round(cast(nearest_venue.c.meters / METERS_PER_MILE, Numeric), 1).cast(Float)
+        ).join(nearest_venue, true()).filter(
             NIBRSCrimeData.latitude.isnot(None),
             NIBRSCrimeData.longitude.isnot(None),
             NIBRSCrimeData.overall_risk_score >= min_risk
@@ -687,57 +825,37 @@ def get_nibrs_near_venues():
         elif crime_type == 'human_trafficking':
             query = query.filter(NIBRSCrimeData.human_trafficking_offenses > 0)
         
-        all_records = query.order_by(NIBRSCrimeData.overall_risk_score.desc()).limit(limit * 3).all()
-        
-        # Filter by distance
-        filtered_records = []
-        for record in all_records:
-            record_lat = float(record.latitude)
-            record_lon = float(record.longitude)
-            
-            for venue in venues:
-                distance = haversine_distance(
-                    record_lat, record_lon,
-                    float(venue.latitude), float(venue.longitude)
-                )
-                
-                if distance <= max_distance:
-                    filtered_records.append({
-                        'record': record,
-                        'nearest_venue': venue.venue_name,
-                        'distance_miles': round(distance, 1)
-                    })
-                    break
-            
-            if len(filtered_records) >= limit:
-                break
-        
-        # Build GeoJSON
-        features = []
-        for item in filtered_records:
-            record = item['record']
-            features.append({
+        # Server-side cursor, fetched 500 rows at a time
+        filtered_records = db.session.execute(
+            query.order_by(NIBRSCrimeData.overall_risk_score.desc()).limit(limit),
+            execution_options={'yield_per': 500}
+        )
+        
+        # Build GeoJSON straight from the row tuples
+        features = [
+            {
                 'type': 'Feature',
-                'geometry': {
-                    'type': 'Point',
-                    'coordinates': [float(record.longitude), float(record.latitude)]
-                },
+                'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
                 'properties': {
-                    'agency_name': record.agency_name,
-                    'city': record.city,
-                    'state': record.state,
-                    'year': record.year,
-                    'risk_score': float(record.overall_risk_score or 0),
-                    'total_offenses': record.total_offenses or 0,
-                    'violent_crimes': record.crimes_against_persons or 0,
-                    'property_crimes': record.crimes_against_property or 0,
-                    'homicides': record.murder_nonnegligent_manslaughter or 0,
-                    'human_trafficking': record.human_trafficking_offenses or 0,
-                    'drug_crimes': record.drug_narcotic_offenses or 0,
-                    'nearest_venue': item['nearest_venue'],
-                    'distance_to_venue': item['distance_miles']
+                    'agency_name': agency_name,
+                    'city': city,
+                    'state': record_state,
+                    'year': record_year,
+                    'risk_score': risk_score,
+                    'total_offenses': total_offenses,
+                    'violent_crimes': violent,
+                    'property_crimes': property_crimes,
+                    'homicides': homicides,
+                    'human_trafficking': human_trafficking,
+                    'drug_crimes': drug_crimes,
+                    'nearest_venue': venue_name,
+                    'distance_to_venue': distance_miles
                 }
-            })
+            }
+            for (lon, lat, agency_name, city, record_state, record_year, risk_score, total_offenses,
+                 violent, property_crimes, homicides, human_trafficking, drug_crimes,
+                 venue_name, distance_miles) in filtered_records
+        ]
         
         return jsonify({
             'success': True,
@@ -746,7 +864,7 @@ def get_nibrs_near_venues():
             'metadata': {  # ← Make sure this exists
                 'total_records': len(features),
                 'max_distance_miles': max_distance,
-                'venues_count': len(venues)
+                'venues_count': venues_count
             }
         })
         
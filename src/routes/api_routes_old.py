@@ -1,23 +1,16 @@
-from flask import Blueprint, jsonify, request, current_app
-from sqlalchemy import and_, func, text
 from datetime import datetime
-from sqlalchemy import text, func
-from extensions import db
-from models.models import WorldCupVenue, SmugglingIncident, DataSource
-from flask import Blueprint, jsonify, request
-from sqlalchemy import text, func
-from models.models import db, NIBRSCrimeData, WorldCupVenue
 
-# Note: NIBRSCrimeData will be imported when needed (after you add it to models.py)
-# Uncomment this line after adding NIBRSCrimeData to models.py:
-# from models.models import NIBRSCrimeData
+from flask import Blueprint, jsonify, request, current_app
+from sqlalchemy import func, text
+from src.extensions import db
+from src.models.models import WorldCupVenue, NIBRSCrimeData
+from src.utils.geo_analysis import GeospatialAnalyzer
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
 
 def get_db():
     """Get database session from current app"""
-    from flask_sqlalchemy import SQLAlchemy
     return current_app.extensions['sqlalchemy']
 
 
@@ -327,7 +320,6 @@ def get_heatmap_data():
     """Get heat map data for visualization"""
     
     try:
-        from utils.geo_analysis import GeospatialAnalyzer
         analyzer = GeospatialAnalyzer()
         
         # Get grid size from query params (default 1.0 degrees)
@@ -351,7 +343,6 @@ def get_nearby_incidents(venue_id):
     """Get incidents near a specific venue"""
     
     try:
-        from utils.geo_analysis import GeospatialAnalyzer
         analyzer = GeospatialAnalyzer()
         
         # Get radius from query params (default 50km)
@@ -377,7 +368,6 @@ def get_risk_assessment():
     """Get risk assessment for all venues"""
     
     try:
-        from utils.geo_analysis import GeospatialAnalyzer
         analyzer = GeospatialAnalyzer()
         risk_data = analyzer.risk_assessment()
         analyzer.close()
@@ -397,7 +387,6 @@ def get_hotspots():
     """Get smuggling hotspots"""
     
     try:
-        from utils.geo_analysis import GeospatialAnalyzer
         analyzer = GeospatialAnalyzer()
         
         min_incidents = int(request.args.get('min_incidents', 10))
@@ -419,7 +408,6 @@ def get_temporal_trends():
     """Get temporal trends"""
     
     try:
-        from utils.geo_analysis import GeospatialAnalyzer
         analyzer = GeospatialAnalyzer()
         
         start_date = request.args.get('start_date')
@@ -530,124 +518,6 @@ def get_nibrs_statistics():
         }), 500
 
 
-@api_bp.route('/api/nibrs/by-state', methods=['GET'])
-def get_nibrs_by_state():
-    """
-    Get crime statistics aggregated by state
-    
-    Query Parameters:
-        - year: Filter by year (default: latest year)
-    """
-    try:
-        year = request.args.get('year', type=int)
-        
-        # Build query
-        query = db.session.query(
-            NIBRSCrimeData.state,
-            func.sum(NIBRSCrimeData.total_offenses).label('total_offenses'),
-            func.sum(NIBRSCrimeData.crimes_against_persons).label('violent_crimes'),
-            func.sum(NIBRSCrimeData.murder_nonnegligent_manslaughter).label('homicides'),
-            func.sum(NIBRSCrimeData.drug_narcotic_offenses).label('drug_crimes'),
-            func.avg(NIBRSCrimeData.overall_risk_score).label('avg_risk_score'),
-            func.count(NIBRSCrimeData.id).label('agency_count')
-        ).group_by(NIBRSCrimeData.state)
-        
-        if year:
-            query = query.filter(NIBRSCrimeData.year == year)
-        
-        results = query.all()
-        
-        # Format results
-        state_data = []
-        for row in results:
-            state_data.append({
-                'state': row.state,
-                'total_offenses': int(row.total_offenses or 0),
-                'violent_crimes': int(row.violent_crimes or 0),
-                'homicides': int(row.homicides or 0),
-                'drug_crimes': int(row.drug_crimes or 0),
-                'avg_risk_score': float(row.avg_risk_score or 0),
-                'agency_count': int(row.agency_count)
-            })
-        
-        # Sort by total offenses
-        state_data.sort(key=lambda x: x['total_offenses'], reverse=True)
-        
-        return jsonify({
-            'success': True,
-            'data': state_data,
-            'year': year
-        })
-        
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
-
-
-@api_bp.route('/api/nibrs/high-risk-areas', methods=['GET'])
-def get_high_risk_areas():
-    """
-    Get agencies with highest risk scores
-    
-    Query Parameters:
-        - limit: Number of results (default: 20)
-        - year: Filter by year
-        - min_risk: Minimum risk score (default: 50)
-    """
-    try:
-        limit = request.args.get('limit', default=20, type=int)
-        year = request.args.get('year', type=int)
-        min_risk = request.args.get('min_risk', default=50, type=float)
-        
-        # Build query
-        query = db.session.query(NIBRSCrimeData).filter(
-            NIBRSCrimeData.overall_risk_score >= min_risk
-        )
-        
-        if year:
-            query = query.filter(NIBRSCrimeData.year == year)
-        
-        results = query.order_by(
-            NIBRSCrimeData.overall_risk_score.desc()
-        ).limit(limit).all()
-        
-        # Format results
-        high_risk_areas = []
-        for record in results:
-            high_risk_areas.append({
-                'agency_name': record.agency_name,
-                'city': record.city,
-                'state': record.state,
-                'year': record.year,
-                'risk_score': round(record.overall_risk_score or 0, 2),
-                'total_offenses': record.total_offenses or 0,
-                'violent_crimes': record.crimes_against_persons or 0,
-                'homicides': record.murder_nonnegligent_manslaughter or 0,
-                'human_trafficking': record.human_trafficking_offenses or 0,
-                'latitude': record.latitude,
-                'longitude': record.longitude
-            })
-        
-        return jsonify({
-            'success': True,
-            'data': high_risk_areas,
-            'count': len(high_risk_areas),
-            'filters': {
-                'min_risk': min_risk,
-                'year': year,
-                'limit': limit
-            }
-        })
-        
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
-
-
 @api_bp.route('/api/nibrs/venue-crime-analysis', methods=['GET'])
 def analyze_venue_crime():
     """
@@ -800,82 +670,6 @@ def get_crime_trends():
         }), 500
 
 
-@api_bp.route('/api/nibrs/geojson', methods=['GET'])
-def get_nibrs_geojson():
-    """
-    Get NIBRS data in GeoJSON format for mapping
-    
-    Query Parameters:
-        - year: Filter by year (default: 2024)
-        - min_risk: Minimum risk score (default: 60)
-        - limit: Max features (default: 500)
-    """
-    try:
-        year = request.args.get('year', default=2024, type=int)
-        min_risk = request.args.get('min_risk', default=60, type=float)
-        limit = request.args.get('limit', default=500, type=int)
-        
-        # Query high-risk agencies with coordinates
-        results = db.session.query(NIBRSCrimeData).filter(
-            NIBRSCrimeData.year == year,
-            NIBRSCrimeData.overall_risk_score >= min_risk,
-            NIBRSCrimeData.latitude.isnot(None),
-            NIBRSCrimeData.longitude.isnot(None)
-        ).order_by(
-            NIBRSCrimeData.overall_risk_score.desc()
-        ).limit(limit).all()
-        
-        # Build GeoJSON
-        features = []
-        for record in results:
-            feature = {
-                'type': 'Feature',
-                'geometry': {
-                    'type': 'Point',
-                    'coordinates': [record.longitude, record.latitude]
-                },
-                'properties': {
-                    'agency_name': record.agency_name,
-                    'city': record.city,
-                    'state': record.state,
-                    'year': record.year,
-                    'risk_score': round(record.overall_risk_score or 0, 2),
-                    'total_offenses': record.total_offenses or 0,
-                    'violent_crimes': record.crimes_against_persons or 0,
-                    'homicides': record.murder_nonnegligent_manslaughter or 0,
-                    'drug_crimes': record.drug_narcotic_offenses or 0,
-                    'human_trafficking': record.human_trafficking_offenses or 0
-                }
-            }
-            features.append(feature)
-        
-        geojson = {
-            'type': 'FeatureCollection',
-            'features': features,
-            'metadata': {
-                'year': year,
-                'min_risk': min_risk,
-                'count': len(features)
-            }
-        }
-        
-        return jsonify(geojson)
-        
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
-
-# At the END of src/routes/api_routes.py, add these 4 endpoints:
-
-# ============================================================================
-# NIBRS CRIME DATA API ENDPOINTS - ADD TO api_routes.py
-# ============================================================================
-# Add this code at the END of your src/routes/api_routes.py file
-
-from sqlalchemy import func, and_, or_
-
 @api_bp.route('/nibrs/geojson', methods=['GET'])
 def get_nibrs_geojson():
     """
@@ -892,8 +686,6 @@ def get_nibrs_geojson():
         GeoJSON FeatureCollection with crime locations
     """
     try:
-        from models.models import NIBRSCrimeData
-        
         # Get parameters
         year = request.args.get('year', default=2024, type=int)
         min_risk = request.args.get('min_risk', default=50, type=float)
@@ -980,8 +772,6 @@ def get_nibrs_geojson():
 def get_nibrs_by_state():
     """Get crime statistics aggregated by state"""
     try:
-        from models.models import NIBRSCrimeData
-        
         year = request.args.get('year', type=int)
         
         # Build query
@@ -1033,8 +823,6 @@ def get_nibrs_by_state():
 def get_high_risk_areas():
     """Get agencies with highest risk scores"""
     try:
-        from models.models import NIBRSCrimeData
-        
         limit = request.args.get('limit', default=20, type=int)
         year = request.args.get('year', type=int)
         min_risk = request.args.get('min_risk', default=50, type=float)
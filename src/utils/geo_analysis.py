@@ -5,51 +5,97 @@ Advanced spatial queries and analysis for smuggling intelligence
 Place in: src/utils/geo_analysis.py
 """
 
-import sys
-sys.path.append('src')
-
-from sqlalchemy import create_engine, func, and_, or_
-from sqlalchemy.orm import sessionmaker
-from models.models import WorldCupVenue, SmugglingIncident, DataSource
+from sqlalchemy import create_engine, func, and_, or_, text
+from sqlalchemy.orm import raiseload, sessionmaker
+from src.models.models import WorldCupVenue, SmugglingIncident, SmugglingRoute, DataSource, calculate_distance, calculate_distance_bulk, calculate_distance_matrix
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 from typing import List, Dict, Tuple, Optional
 import os
 from dotenv import load_dotenv
-import math
 
 load_dotenv()
 
 
+# One engine (and connection pool) per database URL, shared by every
+# analyzer in the process; building an analyzer only opens a session
+_ENGINES = {}
+
+
+def get_engine(db_url=None):
+    """
+    Return the process-wide engine for db_url, creating it on first use
+    
+    Args:
+        db_url: Database URL (default: DATABASE_URL, else the local SQLite file)
+    """
+    if db_url is None:
+        db_url = os.getenv('DATABASE_URL', 'sqlite:///worldcup_intelligence.db')
+    engine = _ENGINES.get(db_url)
+    if engine is None:
+        engine = _ENGINES[db_url] = create_engine(db_url, echo=False)
+    return engine
+
+
 class GeospatialAnalyzer:
     """Geospatial analysis for smuggling intelligence"""
     
-    def __init__(self, db_url=None):
-        if db_url is None:
-            db_url = os.getenv('DATABASE_URL', 'sqlite:///worldcup_intelligence.db')
+    def __init__(self, db_url=None, engine=None):
+        """
+        Args:
+            db_url: Database URL (default: DATABASE_URL); ignored if engine is given
+            engine: Existing engine to use, e.g. the Flask app's db.engine
+        """
+        if engine is None:
+            engine = get_engine(db_url)
         
-        self.engine = create_engine(db_url, echo=False)
+        self.engine = engine
         Session = sessionmaker(bind=self.engine)
         self.session = Session()
+        
+        # Proximity queries can be answered by PostGIS (GiST-indexed geog columns)
+        self.use_postgis = self.engine.dialect.name == 'postgresql'
+        
+        # Incident frame shared by the report methods (see load_incidents)
+        self._incidents_df = None
+        # Per-venue distance index built over that frame (see _venue_distance_index)
+        self._venue_index = None
+    
+    def load_incidents(self, refresh: bool = False) -> pd.DataFrame:
+        """
+        Load the incident columns used by the analysis methods into a DataFrame
+        
+        The frame is read once and memoized on the analyzer so that the
+        summary report, venue analysis and temporal analysis share a single
+        scan of smuggling_incidents.
+        
+        Args:
+            refresh: Re-read the table even if a frame is already cached
+            
+        Returns:
+            DataFrame with one row per incident
+        """
+        if self._incidents_df is None or refresh:
+            self._incidents_df = pd.read_sql(
+                text("""
+                    SELECT id, incident_date, incident_year, incident_month,
+                           latitude, longitude, location_description,
+                           number_dead, number_missing
+                    FROM smuggling_incidents
+                """),
+                self.engine,
+                parse_dates=['incident_date']
+            )
+        
+        return self._incidents_df
     
     def calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """
         Calculate distance between two points using Haversine formula
         Returns distance in kilometers
         """
-        # Convert to radians
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-        
-        # Haversine formula
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        # Radius of Earth in kilometers
-        r = 6371
-        
-        return c * r
+        return calculate_distance(lat1, lon1, lat2, lon2)
     
     def find_incidents_near_venue(self, venue_id: int, radius_km: float = 50) -> List[Dict]:
         """
@@ -66,136 +112,355 @@ class GeospatialAnalyzer:
         if not venue:
             return []
         
+        if self.use_postgis:
+            # Radius filter and distance on the GiST-indexed geog columns
+            # (sphere, matching calculate_distance)
+            distance_m = func.ST_Distance(SmugglingIncident.geog, WorldCupVenue.geog, False)
+            rows = self.session.query(SmugglingIncident, distance_m).options(raiseload('*')).join(
+                WorldCupVenue, WorldCupVenue.id == venue_id
+            ).filter(
+                func.ST_DWithin(SmugglingIncident.geog, WorldCupVenue.geog, radius_km * 1000, False)
+            ).order_by(distance_m).all()
+            
+            return [{
+                'incident_id': incident.id,
+                'incident_date': incident.incident_date,
+                'location_description': incident.location_description,
+                'distance_km': round(meters / 1000, 2),
+                'number_dead': incident.number_dead,
+                'number_missing': incident.number_missing,
+                'latitude': incident.latitude,
+                'longitude': incident.longitude
+            } for incident, meters in rows]
+        
         # Get all incidents with coordinates
-        incidents = self.session.query(SmugglingIncident).filter(
+        incidents = self.session.query(SmugglingIncident).options(raiseload('*')).filter(
             and_(
                 SmugglingIncident.latitude.isnot(None),
                 SmugglingIncident.longitude.isnot(None)
             )
         ).all()
         
-        # Calculate distances and filter
+        # Calculate all distances in one vectorized pass and filter
+        distances = calculate_distance_bulk(
+            venue.latitude, venue.longitude,
+            np.fromiter((i.latitude for i in incidents), dtype=float, count=len(incidents)),
+            np.fromiter((i.longitude for i in incidents), dtype=float, count=len(incidents))
+        )
+        
         nearby_incidents = []
-        for incident in incidents:
-            distance = self.calculate_distance(
-                venue.latitude, venue.longitude,
-                incident.latitude, incident.longitude
-            )
-            
-            if distance <= radius_km:
-                nearby_incidents.append({
-                    'incident_id': incident.id,
-                    'incident_date': incident.incident_date,
-                    'location_description': incident.location_description,
-                    'distance_km': round(distance, 2),
-                    'number_dead': incident.number_dead,
-                    'number_missing': incident.number_missing,
-                    'latitude': incident.latitude,
-                    'longitude': incident.longitude
-                })
+        for pos in np.flatnonzero(distances <= radius_km):
+            incident = incidents[pos]
+            nearby_incidents.append({
+                'incident_id': incident.id,
+                'incident_date': incident.incident_date,
+                'location_description': incident.location_description,
+                'distance_km': round(float(distances[pos]), 2),
+                'number_dead': incident.number_dead,
+                'number_missing': incident.number_missing,
+                'latitude': incident.latitude,
+                'longitude': incident.longitude
+            })
         
         # Sort by distance
         nearby_incidents.sort(key=lambda x: x['distance_km'])
         
         return nearby_incidents
     
-    def analyze_all_venues(self, radius_km: float = 50) -> Dict:
+    def find_routes_near_venue(self, venue_id: int, radius_km: float = 50) -> List[Dict]:
+        """
+        Find smuggling routes passing within the specified radius of a venue
+        
+        Args:
+            venue_id: ID of the World Cup venue
+            radius_km: Search radius in kilometers (default 50km)
+            
+        Returns:
+            List of routes with their closest distance to the venue
+        """
+        venue = self.session.get(WorldCupVenue, venue_id)
+        if not venue:
+            return []
+        
+        if self.use_postgis:
+            # Distance to the whole line (not just its vertices), GiST-indexed
+            distance_m = func.ST_Distance(SmugglingRoute.route_geom, WorldCupVenue.geog, False)
+            rows = self.session.query(SmugglingRoute, distance_m).join(
+                WorldCupVenue, WorldCupVenue.id == venue_id
+            ).filter(
+                func.ST_DWithin(SmugglingRoute.route_geom, WorldCupVenue.geog, radius_km * 1000, False)
+            ).order_by(distance_m).all()
+            
+            return [{
+                'route_id': route.id,
+                'route_name': route.route_name,
+                'activity_level': route.activity_level,
+                'distance_km': round(meters / 1000, 2)
+            } for route, meters in rows]
+        
+        # Without PostGIS, approximate with the closest route vertex
+        nearby_routes = []
+        for route in self.session.query(SmugglingRoute).all():
+            points = [p for p in route.route_coordinates or []
+                      if p.get('lat') is not None and p.get('lon') is not None]
+            if not points:
+                continue
+            distances = calculate_distance_bulk(
+                venue.latitude, venue.longitude,
+                np.array([p['lat'] for p in points], dtype=float),
+                np.array([p['lon'] for p in points], dtype=float)
+            )
+            closest = float(distances.min())
+            if closest <= radius_km:
+                nearby_routes.append({
+                    'route_id': route.id,
+                    'route_name': route.route_name,
+                    'activity_level': route.activity_level,
+                    'distance_km': round(closest, 2)
+                })
+        
+        nearby_routes.sort(key=lambda x: x['distance_km'])
+        
+        return nearby_routes
+    
+    def analyze_all_venues(self, radius_km: float = 50,
+                           incidents: Optional[pd.DataFrame] = None) -> Dict:
         """
         Analyze incidents near all World Cup venues
         
         Args:
             radius_km: Search radius in kilometers
+            incidents: Incident frame from load_incidents(). When omitted on
+                PostgreSQL the PostGIS query is used instead.
             
         Returns:
             Dictionary with analysis results for each venue
         """
-        venues = self.session.query(WorldCupVenue).all()
+        if incidents is None:
+            if self.use_postgis:
+                return self._analyze_all_venues_postgis(radius_km)
+            incidents = self.load_incidents()
+        
+        venues, located, casualties, order, sorted_km = self._venue_distance_index(incidents)
         
         analysis_results = {}
         
-        for venue in venues:
-            incidents = self.find_incidents_near_venue(venue.id, radius_km)
+        for row, venue in enumerate(venues):
+            # Rows are sorted by distance, so the radius query is a binary
+            # search and the closest incidents are a prefix. NaN distances
+            # (venue without coordinates) sort last and never match.
+            count = int(np.searchsorted(sorted_km[row], radius_km, side='right'))
+            within = order[row, :count]
             
-            total_casualties = sum(
-                (inc.get('number_dead', 0) + inc.get('number_missing', 0)) 
-                for inc in incidents
-            )
+            nearby = []
+            for rank, pos in enumerate(within[:5]):
+                incident = located.iloc[pos]
+                nearby.append({
+                    'incident_id': int(incident['id']),
+                    'incident_date': incident['incident_date'].date() if pd.notna(incident['incident_date']) else None,
+                    'location_description': incident['location_description'],
+                    'distance_km': round(float(sorted_km[row, rank]), 2),
+                    'number_dead': None if pd.isna(incident['number_dead']) else int(incident['number_dead']),
+                    'number_missing': None if pd.isna(incident['number_missing']) else int(incident['number_missing']),
+                    'latitude': float(incident['latitude']),
+                    'longitude': float(incident['longitude'])
+                })
             
             analysis_results[venue.venue_name] = {
                 'venue_id': venue.id,
                 'city': venue.city,
                 'country': venue.country,
                 'security_risk_level': venue.security_risk_level,
-                'incidents_within_radius': len(incidents),
-                'total_casualties': total_casualties,
-                'closest_incident_km': incidents[0]['distance_km'] if incidents else None,
-                'incidents': incidents[:5]  # Top 5 closest
+                'incidents_within_radius': count,
+                'total_casualties': int(casualties[within].sum()),
+                'closest_incident_km': nearby[0]['distance_km'] if nearby else None,
+                'incidents': nearby  # Top 5 closest
+            }
+        
+        return analysis_results
+    
+    def _venue_distance_index(self, incidents: pd.DataFrame) -> Tuple:
+        """
+        Build (and memoize) a per-venue distance index over an incident frame
+        
+        Computes the (venues x incidents) Haversine matrix in one vectorized
+        pass and sorts each venue's row once. Every later radius query against
+        the same frame (e.g. the 100km risk assessment and the 50km venue
+        analysis) reuses it instead of recomputing distances.
+        
+        Returns:
+            (venues, located incidents, casualties, order, sorted_km) where
+            order[v] are incident positions sorted by distance from venue v
+            and sorted_km[v] the matching distances
+        """
+        if self._venue_index is not None and self._venue_index[0] is incidents:
+            return self._venue_index[1]
+        
+        venues = self.session.query(WorldCupVenue).all()
+        
+        located = incidents[incidents['latitude'].notna() & incidents['longitude'].notna()]
+        inc_lat = located['latitude'].to_numpy(dtype=float)
+        inc_lon = located['longitude'].to_numpy(dtype=float)
+        casualties = (
+            located['number_dead'].fillna(0).to_numpy()
+            + located['number_missing'].fillna(0).to_numpy()
+        )
+        
+        # (V, N) Haversine distance matrix in one call (compiled kernel or numpy)
+        venue_lat = np.array([v.latitude for v in venues], dtype=float)
+        venue_lon = np.array([v.longitude for v in venues], dtype=float)
+        distances = calculate_distance_matrix(venue_lat, venue_lon, inc_lat, inc_lon)
+        
+        order = np.argsort(distances, axis=1, kind='stable')
+        sorted_km = np.take_along_axis(distances, order, axis=1)
+        
+        index = (venues, located, casualties, order, sorted_km)
+        self._venue_index = (incidents, index)
+        
+        return index
+    
+    def _analyze_all_venues_postgis(self, radius_km: float,
+                                    include_incidents: bool = True) -> Dict:
+        """
+        PostGIS version of analyze_all_venues
+        
+        Uses the generated ``geog`` columns and their GiST indexes (created by
+        scripts/setup_database_postgresql.py) so the radius filter and the
+        closest-incident lookup are index scans instead of a Python loop over
+        every incident. Distances are spherical to match calculate_distance.
+        
+        Args:
+            radius_km: Search radius in kilometers
+            include_incidents: Also fetch the 5 closest incidents per venue.
+                Counts, casualties and the closest distance always come from
+                a single set-returning query.
+        """
+        params = {'radius_m': radius_km * 1000}
+        
+        summary_rows = self.session.execute(text("""
+            SELECT v.id, v.venue_name, v.city, v.country, v.security_risk_level,
+                   agg.incident_count, agg.total_casualties, agg.closest_m
+            FROM worldcup_venues v
+            LEFT JOIN LATERAL (
+                SELECT COUNT(*) AS incident_count,
+                       COALESCE(SUM(COALESCE(i.number_dead, 0)
+                                    + COALESCE(i.number_missing, 0)), 0) AS total_casualties,
+                       MIN(ST_Distance(i.geog, v.geog, false)) AS closest_m
+                FROM smuggling_incidents i
+                WHERE ST_DWithin(i.geog, v.geog, :radius_m, false)
+            ) agg ON true
+        """), params).fetchall()
+        
+        if not include_incidents:
+            nearby_rows = []
+        else:
+            nearby_rows = self.session.execute(text("""
+                SELECT v.id AS venue_id, n.*
+                FROM worldcup_venues v
+                CROSS JOIN LATERAL (
+                    SELECT i.id AS incident_id, i.incident_date, i.location_description,
+                           ST_Distance(i.geog, v.geog, false) / 1000.0 AS distance_km,
+                           i.number_dead, i.number_missing, i.latitude, i.longitude
+                    FROM smuggling_incidents i
+                    WHERE ST_DWithin(i.geog, v.geog, :radius_m, false)
+                    ORDER BY i.geog <-> v.geog
+                    LIMIT 5
+                ) n
+                ORDER BY v.id, n.distance_km
+            """), params).mappings().all()
+        
+        closest = {}
+        for row in nearby_rows:
+            closest.setdefault(row['venue_id'], []).append({
+                'incident_id': row['incident_id'],
+                'incident_date': row['incident_date'],
+                'location_description': row['location_description'],
+                'distance_km': round(row['distance_km'], 2),
+                'number_dead': row['number_dead'],
+                'number_missing': row['number_missing'],
+                'latitude': row['latitude'],
+                'longitude': row['longitude']
+            })
+        
+        analysis_results = {}
+        
+        for row in summary_rows:
+            incidents = closest.get(row.id, [])
+            analysis_results[row.venue_name] = {
+                'venue_id': row.id,
+                'city': row.city,
+                'country': row.country,
+                'security_risk_level': row.security_risk_level,
+                'incidents_within_radius': row.incident_count,
+                'total_casualties': int(row.total_casualties),
+                'closest_incident_km': round(row.closest_m / 1000, 2) if row.closest_m is not None else None,
+                'incidents': incidents  # Top 5 closest
             }
         
         return analysis_results
     
-    def generate_heat_map_data(self, grid_size: float = 1.0) -> List[Dict]:
+    def generate_heat_map_data(self, grid_size: float = 1.0,
+                               incidents: Optional[pd.DataFrame] = None) -> List[Dict]:
         """
         Generate heat map data by aggregating incidents into grid cells
         
         Args:
             grid_size: Size of grid cells in degrees (default 1.0)
+            incidents: Incident frame from load_incidents() (loaded if omitted)
             
         Returns:
             List of grid cells with incident counts
         """
-        incidents = self.session.query(SmugglingIncident).filter(
-            and_(
-                SmugglingIncident.latitude.isnot(None),
-                SmugglingIncident.longitude.isnot(None)
-            )
-        ).all()
+        if incidents is None:
+            incidents = self.load_incidents()
+        
+        located = incidents[incidents['latitude'].notna() & incidents['longitude'].notna()]
+        
+        # Round coordinates to grid and group incidents into cells
+        grid = pd.DataFrame({
+            'latitude': (located['latitude'] / grid_size).round() * grid_size,
+            'longitude': (located['longitude'] / grid_size).round() * grid_size,
+            'number_dead': located['number_dead'].fillna(0),
+            'number_missing': located['number_missing'].fillna(0)
+        })
+        cells = grid.groupby(['latitude', 'longitude'], sort=False).agg(
+            incident_count=('number_dead', 'size'),
+            total_dead=('number_dead', 'sum'),
+            total_missing=('number_missing', 'sum')
+        ).reset_index()
         
-        # Group incidents into grid cells
-        grid_data = {}
-        
-        for incident in incidents:
-            # Round coordinates to grid
-            grid_lat = round(incident.latitude / grid_size) * grid_size
-            grid_lon = round(incident.longitude / grid_size) * grid_size
-            grid_key = (grid_lat, grid_lon)
-            
-            if grid_key not in grid_data:
-                grid_data[grid_key] = {
-                    'latitude': grid_lat,
-                    'longitude': grid_lon,
-                    'incident_count': 0,
-                    'total_dead': 0,
-                    'total_missing': 0
-                }
-            
-            grid_data[grid_key]['incident_count'] += 1
-            grid_data[grid_key]['total_dead'] += incident.number_dead or 0
-            grid_data[grid_key]['total_missing'] += incident.number_missing or 0
+        # Sort by intensity
+        cells = cells.sort_values('incident_count', ascending=False, kind='stable')
         
-        # Convert to list and add intensity
         heat_map_data = []
-        for cell in grid_data.values():
-            cell['intensity'] = cell['incident_count']
-            cell['total_casualties'] = cell['total_dead'] + cell['total_missing']
-            heat_map_data.append(cell)
-        
-        # Sort by intensity
-        heat_map_data.sort(key=lambda x: x['intensity'], reverse=True)
+        for cell in cells.itertuples(index=False):
+            total_dead = int(cell.total_dead)
+            total_missing = int(cell.total_missing)
+            heat_map_data.append({
+                'latitude': float(cell.latitude),
+                'longitude': float(cell.longitude),
+                'incident_count': int(cell.incident_count),
+                'total_dead': total_dead,
+                'total_missing': total_missing,
+                'intensity': int(cell.incident_count),
+                'total_casualties': total_dead + total_missing
+            })
         
         return heat_map_data
     
-    def identify_hotspots(self, min_incidents: int = 10) -> List[Dict]:
+    def identify_hotspots(self, min_incidents: int = 10,
+                          incidents: Optional[pd.DataFrame] = None) -> List[Dict]:
         """
         Identify smuggling hotspots (areas with high incident concentration)
         
         Args:
             min_incidents: Minimum incidents to qualify as hotspot
+            incidents: Incident frame from load_incidents() (loaded if omitted)
             
         Returns:
             List of hotspot locations
         """
-        heat_data = self.generate_heat_map_data(grid_size=0.5)
+        heat_data = self.generate_heat_map_data(grid_size=0.5, incidents=incidents)
         
         hotspots = [
             cell for cell in heat_data 
@@ -204,71 +469,80 @@ class GeospatialAnalyzer:
         
         return hotspots
     
-    def temporal_analysis(self, start_date=None, end_date=None) -> Dict:
+    def temporal_analysis(self, start_date=None, end_date=None,
+                          incidents: Optional[pd.DataFrame] = None) -> Dict:
         """
         Analyze incident trends over time
         
         Args:
             start_date: Start date for analysis
             end_date: End date for analysis
+            incidents: Incident frame from load_incidents() (loaded if omitted)
             
         Returns:
             Dictionary with temporal trends
         """
-        query = self.session.query(SmugglingIncident).filter(
-            SmugglingIncident.incident_date.isnot(None)
-        )
+        if incidents is None:
+            incidents = self.load_incidents()
+        
+        dated = incidents[incidents['incident_date'].notna()]
         
         if start_date:
-            query = query.filter(SmugglingIncident.incident_date >= start_date)
+            dated = dated[dated['incident_date'] >= pd.Timestamp(start_date)]
         if end_date:
-            query = query.filter(SmugglingIncident.incident_date <= end_date)
+            dated = dated[dated['incident_date'] <= pd.Timestamp(end_date)]
         
-        incidents = query.all()
-        
-        # Group by year and month
-        temporal_data = {}
-        
-        for incident in incidents:
-            year = incident.incident_year
-            month = incident.incident_month
-            
-            if year and month:
-                key = f"{year}-{month:02d}"
-                
-                if key not in temporal_data:
-                    temporal_data[key] = {
-                        'year': year,
-                        'month': month,
-                        'incident_count': 0,
-                        'total_dead': 0,
-                        'total_missing': 0
-                    }
-                
-                temporal_data[key]['incident_count'] += 1
-                temporal_data[key]['total_dead'] += incident.number_dead or 0
-                temporal_data[key]['total_missing'] += incident.number_missing or 0
+        # Group by year and month (rows missing either are skipped)
+        has_period = (
+            dated['incident_year'].fillna(0).ne(0)
+            & dated['incident_month'].fillna(0).ne(0)
+        )
+        periods = dated[has_period].assign(
+            number_dead=dated['number_dead'].fillna(0),
+            number_missing=dated['number_missing'].fillna(0)
+        )
+        monthly = periods.groupby(['incident_year', 'incident_month']).agg(
+            incident_count=('id', 'size'),
+            total_dead=('number_dead', 'sum'),
+            total_missing=('number_missing', 'sum')
+        )
         
         # Convert to sorted list
-        temporal_trends = sorted(temporal_data.values(), key=lambda x: (x['year'], x['month']))
+        temporal_trends = [
+            {
+                'year': int(year),
+                'month': int(month),
+                'incident_count': int(row.incident_count),
+                'total_dead': int(row.total_dead),
+                'total_missing': int(row.total_missing)
+            }
+            for (year, month), row in monthly.iterrows()
+        ]
         
         return {
-            'total_incidents': len(incidents),
+            'total_incidents': len(dated),
             'date_range': {
-                'start': min([i.incident_date for i in incidents if i.incident_date]),
-                'end': max([i.incident_date for i in incidents if i.incident_date])
+                'start': dated['incident_date'].min().date() if len(dated) else None,
+                'end': dated['incident_date'].max().date() if len(dated) else None
             },
             'monthly_trends': temporal_trends
         }
     
-    def risk_assessment(self) -> List[Dict]:
+    def risk_assessment(self, incidents: Optional[pd.DataFrame] = None) -> List[Dict]:
         """
         Assess risk levels for each World Cup venue based on nearby incidents
         
+        Args:
+            incidents: Incident frame from load_incidents() (optional)
+        
         Returns:
             List of venues with calculated risk scores
         """
-        venue_analysis = self.analyze_all_venues(radius_km=100)
+        if incidents is None and self.use_postgis:
+            # Counts and nearest distances only; no per-incident rows needed
+            venue_analysis = self._analyze_all_venues_postgis(radius_km=100, include_incidents=False)
+        else:
+            venue_analysis = self.analyze_all_venues(radius_km=100, incidents=incidents)
         
         risk_assessments = []
         
@@ -311,37 +585,37 @@ class GeospatialAnalyzer:
         
         return risk_assessments
     
-    def generate_summary_report(self) -> Dict:
-        """Generate comprehensive summary report"""
+    def generate_summary_report(self, incidents: Optional[pd.DataFrame] = None) -> Dict:
+        """
+        Generate comprehensive summary report
+        
+        Args:
+            incidents: Incident frame from load_incidents() (loaded if omitted)
+        """
+        if incidents is None:
+            incidents = self.load_incidents()
         
         total_venues = self.session.query(WorldCupVenue).count()
-        total_incidents = self.session.query(SmugglingIncident).count()
+        total_incidents = len(incidents)
         
         # Get date range
-        incidents_with_dates = self.session.query(SmugglingIncident).filter(
-            SmugglingIncident.incident_date.isnot(None)
-        ).all()
+        dates = incidents['incident_date'].dropna()
         
-        if incidents_with_dates:
-            min_date = min([i.incident_date for i in incidents_with_dates])
-            max_date = max([i.incident_date for i in incidents_with_dates])
+        if len(dates):
+            min_date = dates.min().date()
+            max_date = dates.max().date()
         else:
             min_date = max_date = None
         
         # Calculate totals
-        total_dead = self.session.query(
-            func.sum(SmugglingIncident.number_dead)
-        ).scalar() or 0
-        
-        total_missing = self.session.query(
-            func.sum(SmugglingIncident.number_missing)
-        ).scalar() or 0
+        total_dead = incidents['number_dead'].sum()
+        total_missing = incidents['number_missing'].sum()
         
         # Get hotspots
-        hotspots = self.identify_hotspots(min_incidents=5)
+        hotspots = self.identify_hotspots(min_incidents=5, incidents=incidents)
         
-        # Get risk assessments
-        risk_data = self.risk_assessment()
+        # Get risk assessments (one PostGIS query when available)
+        risk_data = self.risk_assessment(incidents=None if self.use_postgis else incidents)
         
         return {
             'overview': {